@@ -1,20 +1,23 @@
 import sys
+from collections import deque
 from datetime import datetime
 
-from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QInputDialog
-from PyQt6.QtCore import QStringListModel
+from PyQt6.QtWidgets import QApplication, QMainWindow, QMessageBox, QInputDialog, QProgressBar
+from PyQt6.QtCore import QStringListModel, QThreadPool
 from engine.mainwindow_qt import Ui_MainWindow
 
-from sqlite3 import Error as SqliteError
-
 from engine import database as db
-from engine.individual import Individual
-from engine.checkingAccount import CheckingAccount
-from engine.deposit import Deposit
-from engine.withdraw import Withdraw
+from engine.money import Money
+from engine.banking_service import BankingService, MINIMUM_AGE
 from engine.date_dialog import DateDialog
+from engine.log_writer import LogWriter
+from engine.event_log import EventLog
+from engine.db_worker import DbWorker
 
 LOG_FILE = "log_bancario.txt"
+EVENT_LOG_FILE = "eventos_bancarios.jsonl" # log estruturado, consultável com: python -m engine.event_log
+STATEMENT_PAGE_SIZE = 200 # transações carregadas por vez no extrato
+LOG_VIEW_MAX_LINES = 5000 # linhas mantidas na tela; o arquivo guarda tudo
 
 class BankingApp(QMainWindow):
     def __init__(self):
@@ -25,16 +28,37 @@ class BankingApp(QMainWindow):
 
         db.create_project_tables()
 
-        self.log_messages= []
+        # a tela guarda só as ultimas linhas; a gravação no arquivo é feita por uma thread
+        self.log_messages = deque(maxlen=LOG_VIEW_MAX_LINES)
+        self.log_writer = LogWriter(LOG_FILE)
+        self.event_log = EventLog(EVENT_LOG_FILE)
+        self.service = BankingService(event_log=self.event_log)
         self.connect_signals()
 
-        self.log_model = QStringListModel(self.log_messages)
+        self.log_model = QStringListModel(list(self.log_messages))
         self.ui.listView.setModel(self.log_model)
 
         # variaveis para guardar a sessão atual
         self.current_client = None
         self.current_account = None
 
+        # extrato aberto: (numero da conta, id da ultima transação mostrada); None quando não há mais paginas
+        self.statement_cursor = None
+        self.statement_worker = None # pagina do extrato sendo buscada em segundo plano
+        self.statement_loaded = 0
+        self.statement_total = 0
+        # actionTriggered só vem de ação do usuario na barra (arrastar, clicar, roda do mouse);
+        # o valueChanged também dispara com o scrollToBottom do proprio log e puxaria paginas sozinho
+        self.ui.listView.verticalScrollBar().actionTriggered.connect(self.load_more_statement)
+
+        # as chamadas ao banco rodam no pool de threads; a janela só recebe os resultados por sinais
+        self.thread_pool = QThreadPool.globalInstance()
+        self.workers = set() # operações em andamento (guarda a referencia até terminarem)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(250)
+        self.progress_bar.hide()
+        self.statusBar().addPermanentWidget(self.progress_bar)
+
     def connect_signals(self):    
         self.ui.deposit_button.clicked.connect(self.deposit_func)
         self.ui.withdrawn_button.clicked.connect(self.withdraw_func)
@@ -44,23 +68,88 @@ class BankingApp(QMainWindow):
         self.ui.list_accounts_button.clicked.connect(self.select_active_client_and_account)
 
     def log_message(self, txt):
+        self.log_lines([txt])
+
+    def run_in_background(self, func, *args, on_finished, busy_message="Processando...", **kwargs):
+        """
+        Roda 'func' numa thread do pool e chama 'on_finished(resultado)' na thread da janela.
+        Enquanto houver operações em andamento, os botões que alteram dados ficam desabilitados.
+        """
+        worker = DbWorker(func, *args, **kwargs)
+        worker.signals.finished.connect(on_finished)
+        worker.signals.error.connect(self.on_background_error)
+        worker.signals.finished.connect(lambda _: self.worker_done(worker))
+        worker.signals.error.connect(lambda _: self.worker_done(worker))
+
+        self.workers.add(worker)
+        self.set_busy(busy_message)
+        self.thread_pool.start(worker)
+        return worker
+
+    def worker_done(self, worker):
+        self.workers.discard(worker)
+        if not self.workers:
+            self.set_busy(None)
+
+    def cancel_worker(self, worker):
+        """Cancela uma operação em segundo plano: o resultado dela será ignorado."""
+        if worker is not None:
+            worker.cancel()
+            self.worker_done(worker)
+
+    def set_busy(self, message):
+        """Mostra (ou limpa, com None) a mensagem de trabalho em andamento e trava os botões de operação."""
+        busy = message is not None
+        for button in (self.ui.deposit_button, self.ui.withdrawn_button, self.ui.create_client_button,
+                       self.ui.create_account_button, self.ui.list_accounts_button):
+            button.setEnabled(not busy)
+        if busy:
+            self.statusBar().showMessage(message)
+        else:
+            self.statusBar().clearMessage()
+
+    def on_background_error(self, exc):
+        self.log_message(f"ERRO DE BANCO DE DADOS: {exc}")
+        QMessageBox.critical(self, "Erro de Banco de Dados", f"Ocorreu um erro inesperado ao acessar o banco de dados.\nDetalhes: {exc}")
+
+    def log_lines(self, lines, scroll=True):
+        """Adiciona varias linhas ao log de uma vez: uma atualização da lista e o envio pra fila do arquivo."""
         timestamp = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
-        msg = f"[{timestamp}] - INFO - {txt}"
-        self.log_messages.append(msg)
-        self.log_model.setStringList(self.log_messages)
-        self.ui.listView.scrollToBottom()
-        try:
-            with open(LOG_FILE, "a", encoding="utf-8") as f:
-                f.write(msg + "\n")
-        except IOError as exc:
-            print(f"Erro ao escrever no log: {exc}")
+        msgs = [f"[{timestamp}] - INFO - {txt}" for txt in lines]
+        self.log_messages.extend(msgs)
+        for msg in msgs:
+            self.log_writer.write(msg)
+
+        # insere só as linhas novas no modelo, sem recriar a lista inteira
+        first_row = self.log_model.rowCount()
+        self.log_model.insertRows(first_row, len(msgs))
+        for offset, msg in enumerate(msgs):
+            self.log_model.setData(self.log_model.index(first_row + offset), msg)
+
+        # mantém a tela do mesmo tamanho do buffer, descartando as linhas mais antigas
+        overflow = self.log_model.rowCount() - LOG_VIEW_MAX_LINES
+        if overflow > 0:
+            self.log_model.removeRows(0, overflow)
+
+        if scroll:
+            self.ui.listView.scrollToBottom()
+
+    def closeEvent(self, event):
+        """Cancela o que está em segundo plano e garante que as linhas da fila cheguem ao arquivo."""
+        for worker in list(self.workers):
+            worker.cancel()
+        self.thread_pool.waitForDone(5000)
+        self.log_writer.close()
+        self.event_log.close()
+        super().closeEvent(event)
     
     def get_cpf(self):
         return self.ui.cpf_input.text().strip()
     
     def get_value(self):
         try:
-            return float(self.ui.value_input.text().strip())
+            # Money aceita "10.50" e "10,50" e guarda o valor em centavos inteiros
+            return Money(self.ui.value_input.text().strip())
         except ValueError:
             return None
 
@@ -81,10 +170,9 @@ class BankingApp(QMainWindow):
         else:
             return
 
-        today = datetime.now().date()
-        age = today.year - birth_date_obj.year - ((today.month, today.day) < (birth_date_obj.month, birth_date_obj.day))
+        age = self.service.client_age(birth_date_obj)
         
-        if age < 18:
+        if age < MINIMUM_AGE:
             self.log_message(f"Tentativa de cadastro de menor de idade (CPF: {cpf}, Idade: {age}).")
             QMessageBox.warning(self, "Idade Inválida", f"O cliente deve ter no mínimo 18 anos. Idade calculada: {age} anos.")
             return
@@ -92,9 +180,12 @@ class BankingApp(QMainWindow):
         address, ok = QInputDialog.getText(self, "Novo Cliente", "Endereço:")
         if not ok or not address.strip(): return
         
-        birth_date_str = birth_date_obj.strftime("%d-%m-%Y")
-        
-        if db.add_client(cpf, name, birth_date_str, address):
+        self.run_in_background(self.service.create_client, cpf, name, birth_date_obj, address,
+                               on_finished=lambda created: self.on_client_created(cpf, name, created),
+                               busy_message="Cadastrando cliente...")
+
+    def on_client_created(self, cpf, name, created):
+        if created:
             self.log_message(f"Cliente {name} (CPF: {cpf}) criado com sucesso!")
             QMessageBox.information(self, "Sucesso", "Cliente criado com sucesso!")
             self.ui.cpf_input.clear()
@@ -108,18 +199,19 @@ class BankingApp(QMainWindow):
             QMessageBox.warning(self, "Entrada Inválida", "O campo CPF é obrigatório para criar uma conta.")
             return
 
-        try:
-            new_account_number = db.add_account(agency="0001", balance=0, client_cpf=cpf)
-            if new_account_number:
-                self.log_message(f"Conta {new_account_number} criada para o cliente de CPF {cpf}.")
-                QMessageBox.information(self, "Sucesso", f"Conta {new_account_number} criada com sucesso!")
-                self.ui.cpf_input.clear()
-            else:
-                self.log_message(f"Falha ao criar conta para CPF {cpf}. Cliente não encontrado.")
-                QMessageBox.critical(self, "Erro", "Cliente não encontrado.\nVerifique se o CPF está correto e o cliente já foi cadastrado.")
-        except SqliteError as e:
-            self.log_message(f"ERRO DE BANCO DE DADOS ao criar conta para CPF {cpf}: {e}")
-            QMessageBox.critical(self, "Erro de Banco de Dados", f"Ocorreu um erro inesperado ao acessar o banco de dados.\nDetalhes: {e}")
+        # erros do sqlite chegam em on_background_error
+        self.run_in_background(self.service.create_account, cpf,
+                               on_finished=lambda new_account_number: self.on_account_created(cpf, new_account_number),
+                               busy_message="Criando conta...")
+
+    def on_account_created(self, cpf, new_account_number):
+        if new_account_number:
+            self.log_message(f"Conta {new_account_number} criada para o cliente de CPF {cpf}.")
+            QMessageBox.information(self, "Sucesso", f"Conta {new_account_number} criada com sucesso!")
+            self.ui.cpf_input.clear()
+        else:
+            self.log_message(f"Falha ao criar conta para CPF {cpf}. Cliente não encontrado.")
+            QMessageBox.critical(self, "Erro", "Cliente não encontrado.\nVerifique se o CPF está correto e o cliente já foi cadastrado.")
     
     def deposit_func(self):
         if not self.current_account or self.current_client.cpf != self.get_cpf():
@@ -127,22 +219,25 @@ class BankingApp(QMainWindow):
             return
         
         account = self.current_account
-        client = self.current_client
 
         value = self.get_value()
         if value is None or value <= 0:
             QMessageBox.warning(self, "Valor Inválido", "Por favor, insira um valor de depósito positivo.")
             return
             
-        transaction = Deposit(value)
-        # O perform_transaction ainda é útil para a lógica, mas não para o histórico
-        if client.perform_transaction(account, transaction):
-            db.update_account_balance(account.number, account.balance)
-            db.add_transaction(account.number, "Depósito", value)
-            
+        # saldo e extrato são gravados juntos, numa única transação do banco; o serviço sincroniza o objeto
+        self.run_in_background(self.service.deposit, account, value,
+                               on_finished=lambda new_balance: self.on_deposit_done(account, value, new_balance),
+                               busy_message="Realizando depósito...")
+
+    def on_deposit_done(self, account, value, new_balance):
+        if new_balance is not None:
             self.log_message(f"Depósito de R$ {value:.2f} realizado na conta {account.number}.")
             QMessageBox.information(self, "Sucesso", "Depósito realizado com sucesso!")
             self.ui.value_input.clear()
+        else:
+            self.log_message(f"Tentativa de depósito de R$ {value:.2f} na conta {account.number} falhou.")
+            QMessageBox.warning(self, "Operação Falhou", "Depósito não realizado. Verifique se a conta ainda existe.")
     
     def withdraw_func(self):
         if not self.current_account or self.current_client.cpf != self.get_cpf():
@@ -155,14 +250,14 @@ class BankingApp(QMainWindow):
             return
         
         account = self.current_account
-        client = self.current_client
-            
-        transaction = Withdraw(value)
-        # A lógica de negócio (verificar saldo, etc.) ainda é executada aqui
-        if client.perform_transaction(account, transaction):
-             db.update_account_balance(account.number, account.balance)
-             db.add_transaction(account.number, "Saque", value)
 
+        # saldo e limite são conferidos pelo banco, no mesmo commit que grava o extrato
+        self.run_in_background(self.service.withdraw, account, value,
+                               on_finished=lambda new_balance: self.on_withdraw_done(account, value, new_balance),
+                               busy_message="Realizando saque...")
+
+    def on_withdraw_done(self, account, value, new_balance):
+        if new_balance is not None:
              self.log_message(f"Saque de R$ {value:.2f} realizado na conta {account.number}.")
              QMessageBox.information(self, "Sucesso", "Saque realizado com sucesso!")
              self.ui.value_input.clear()
@@ -176,24 +271,79 @@ class BankingApp(QMainWindow):
             return
         
         account = self.current_account
-        client = self.current_client
-            
-        self.log_message(f"===== Extrato da Conta: {account.number} =====")
-        
-        #Busca as transações do banco de dados
-        transactions = db.get_transactions_by_account(account.number)
 
-        if not transactions:
-            self.log_message("Nenhuma transação encontrada para esta conta.")
+        # O saldo atual vem do objeto já hidratado; as transações são carregadas por paginas
+        self.cancel_worker(self.statement_worker) # um extrato novo substitui o que ainda estava carregando
+        self.statement_worker = None
+        self.statement_cursor = None
+        self.log_lines([
+            f"===== Extrato da Conta: {account.number} =====",
+            f"Saldo atual: R$ {account.balance:.2f}",
+        ])
+        self.statement_cursor = (account.number, 0)
+        self.statement_loaded = 0
+        self.statement_total = 0
+        self.load_statement_page()
+
+    def load_more_statement(self, action):
+        """Carrega a proxima pagina do extrato aberto quando o usuario rola a lista até o fim."""
+        scroll_bar = self.ui.listView.verticalScrollBar()
+        # o sinal vem antes do valor novo ser aplicado: a posição de destino está em sliderPosition()
+        if self.statement_cursor is not None and scroll_bar.sliderPosition() >= scroll_bar.maximum():
+            self.load_statement_page()
+
+    def fetch_statement_page(self, account_number, after_id):
+        """Roda fora da thread da janela: busca a pagina (e, na primeira, o total de transações)."""
+        total = self.service.statement_count(account_number) if after_id == 0 else None
+        return total, self.service.statement(account_number, after_id=after_id, limit=STATEMENT_PAGE_SIZE)
+
+    def load_statement_page(self):
+        """Busca a pagina seguinte do extrato aberto em segundo plano."""
+        if self.statement_worker is not None:
+            return # já tem uma pagina a caminho
+        account_number, after_id = self.statement_cursor
+        worker = DbWorker(self.fetch_statement_page, account_number, after_id)
+        worker.signals.finished.connect(lambda result: self.on_statement_page(worker, account_number, after_id, result))
+        worker.signals.error.connect(lambda exc: self.on_statement_error(worker, exc))
+        self.statement_worker = worker
+        self.thread_pool.start(worker)
+
+    def on_statement_page(self, worker, account_number, after_id, result):
+        """Recebe a pagina do extrato na thread da janela e adiciona ao log."""
+        if worker is not self.statement_worker:
+            return # resposta de um extrato que já foi substituido
+        self.statement_worker = None
+        total, transactions = result
+        if total is not None:
+            self.statement_total = total
+        self.statement_loaded += len(transactions)
+        lines = [f"{trans['date']} - {trans['transaction_type']}: R$ {trans['value']:.2f}" for trans in transactions]
+
+        if len(transactions) < STATEMENT_PAGE_SIZE:
+            # ultima pagina: fecha o extrato
+            self.statement_cursor = None
+            if after_id == 0 and not transactions:
+                lines.append("Nenhuma transação encontrada para esta conta.")
+            lines.append("=" * 40)
+            self.progress_bar.hide()
         else:
-            for trans in transactions:
-                self.log_message(
-                    f"{trans['date']} - {trans['transaction_type']}: R$ {trans['value']:.2f}"
-                )
-        
-        # O saldo final vem do objeto já hidratado
-        self.log_message(f"Saldo atual: R$ {account.balance:.2f}")
-        self.log_message("=" * 40)
+            self.statement_cursor = (account_number, transactions[-1]['id'])
+            # progresso do extrato: quantas das transações da conta já estão na tela
+            self.progress_bar.setRange(0, max(self.statement_total, 1))
+            self.progress_bar.setValue(self.statement_loaded)
+            self.progress_bar.setFormat(f"Extrato: {self.statement_loaded}/{self.statement_total}")
+            self.progress_bar.show()
+
+        # a primeira pagina rola até o fim; as seguintes mantêm a posição do usuario
+        self.log_lines(lines, scroll=(after_id == 0))
+
+    def on_statement_error(self, worker, exc):
+        if worker is not self.statement_worker:
+            return
+        self.statement_worker = None
+        self.statement_cursor = None
+        self.progress_bar.hide()
+        self.on_background_error(exc)
 
     def select_active_client_and_account(self):
         cpf = self.get_cpf()
@@ -201,32 +351,34 @@ class BankingApp(QMainWindow):
             QMessageBox.warning(self, "Entrada Inválida", "Digite um CPF para carregar o cliente.")
             return
         
-        client_data = db.get_client_by_cpf(cpf)
-        if not client_data:
+        # um cliente novo fecha o extrato que estava carregando
+        self.cancel_worker(self.statement_worker)
+        self.statement_worker = None
+        self.statement_cursor = None
+        self.progress_bar.hide()
+
+        self.run_in_background(self.service.load_client, cpf,
+                               on_finished=lambda client_obj: self.on_client_loaded(cpf, client_obj),
+                               busy_message="Carregando cliente...")
+
+    def on_client_loaded(self, cpf, client_obj):
+        """Continua a seleção de cliente/conta na thread da janela, depois que o banco respondeu."""
+        if client_obj is None:
             self.log_message(f"Cliente com CPF {cpf} não encontrado!")
             self.current_client = None
             self.current_account = None
             QMessageBox.warning(self, "Erro", "Cliente não encontrado.")
             return
         
-        client_obj = Individual(name=client_data['name'], birth_date=client_data['birth_date'], cpf=client_data['cpf'], address=client_data['address'])
         self.current_client = client_obj
+        hydrated_accounts = client_obj.accounts
         
-        accounts_data = db.get_accounts_by_client(cpf)
-        
-        if not accounts_data:
+        if not hydrated_accounts:
             self.log_message(f"Cliente {client_obj.name} encontrado, mas não possui contas.")
             self.current_account = None
             QMessageBox.warning(self, "Cliente sem Contas", "Este cliente foi encontrado, mas ainda não possui nenhuma conta bancária.")
             return
 
-        hydrated_accounts = []
-        for acc_data in accounts_data:
-            account_obj = CheckingAccount(number=acc_data['number'], client=client_obj, limit=acc_data['limit_value'], withdrawn_limit=acc_data['withdraw_limit'])
-            account_obj._balance = acc_data['balance'] 
-            client_obj.add_account(account_obj)
-            hydrated_accounts.append(account_obj)
-
         # logica
         selected_account = None
         if len(hydrated_accounts) == 1:
@@ -259,6 +411,7 @@ class BankingApp(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(db.close_all_pools)
     window = BankingApp()
     window.show()
     sys.exit(app.exec())
\ No newline at end of file
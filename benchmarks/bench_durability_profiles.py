@@ -0,0 +1,36 @@
+"""
+Mede quantos commits por segundo cada perfil de durabilidade consegue.
+Uso: python -m benchmarks.bench_durability_profiles [numero_de_operacoes]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from engine import database as db
+from engine.connection_pool import PROFILES
+
+def run_profile(profile, operations, folder):
+    """Cria um banco novo com o perfil e faz 'operations' depósitos, um commit cada."""
+    db.DB_PATH = str(Path(folder) / f"bench_{profile}.db")
+    db.DB_PROFILE = profile
+    db.create_project_tables(profile)
+    db.add_client("00000000000", "Cliente Benchmark", "01-01-1990", "Rua do Benchmark")
+    account_number = db.add_account("0001", 0, "00000000000")
+
+    start = time.perf_counter()
+    for _ in range(operations):
+        db.post_transaction(account_number, db.DEPOSIT, 1.0)
+    elapsed = time.perf_counter() - start
+    db.close_all_pools()
+    return operations / elapsed
+
+def main():
+    operations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as folder:
+        print(f"{'perfil':<10} {'commits/s':>12}")
+        for profile in PROFILES:
+            print(f"{profile:<10} {run_profile(profile, operations, folder):>12.0f}")
+
+if __name__ == "__main__":
+    main()
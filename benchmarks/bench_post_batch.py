@@ -0,0 +1,39 @@
+"""
+Mede o tempo para liquidar um arquivo grande de lançamentos com post_batch.
+Uso: python -m benchmarks.bench_post_batch [numero_de_lancamentos] [tamanho_do_grupo]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from engine import database as db
+
+def main():
+    entries_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    group_size = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+
+    with tempfile.TemporaryDirectory() as folder:
+        db.DB_PATH = str(Path(folder) / "bench_batch.db")
+        db.DB_PROFILE = 'bulk' # a fila de escrita do arquivo nasce no perfil do post_batch
+        db.create_project_tables('bulk')
+        db.add_client("00000000000", "Cliente Benchmark", "01-01-1990", "Rua do Benchmark")
+        accounts = [db.add_account("0001", 0, "00000000000") for _ in range(100)]
+
+        rng = random.Random(42)
+        entries = [
+            (rng.choice(accounts), db.DEPOSIT if rng.random() < 0.6 else db.WITHDRAW, round(rng.uniform(1, 400), 2))
+            for _ in range(entries_count)
+        ]
+
+        start = time.perf_counter()
+        accepted, rejected = db.post_batch(entries, group_size=group_size, profile='bulk')
+        elapsed = time.perf_counter() - start
+        db.close_all_pools()
+
+    print(f"{entries_count} lançamentos em {elapsed:.2f}s ({entries_count / elapsed:.0f}/s): "
+          f"{accepted} aceitos, {len(rejected)} recusados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Mede a vazão de depósitos concorrentes com o banco dividido em 1 ou mais shards
+(cada shard com seu arquivo, seu lock do sqlite e sua fila de escrita).
+Cada processo lança na sua propria conta; as contas são espalhadas pelas agencias (e portanto pelos shards).
+Dentro de um processo só, a fila de escrita já serializa tudo e os shards não aceleram nada (o GIL segura
+as threads); o ganho aparece com varios processos, que num arquivo só disputam o mesmo lock.
+Uso: python -m benchmarks.bench_shards [lancamentos_por_processo] [processos] [shards...]
+"""
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from engine import database as db
+
+def worker(config_path, account_number, per_process, start_event):
+    router = db.ShardRouter.load(config_path)
+    start_event.wait()
+    for _ in range(per_process):
+        router.post_transaction(account_number, db.DEPOSIT, 1)
+    router.close()
+    db.close_all_pools()
+
+def run(shards_count, processes_count, per_process):
+    with tempfile.TemporaryDirectory() as folder:
+        config_path = str(Path(folder) / "shards.json")
+        shards = {f"s{index}": str(Path(folder) / f"shard_{index}.db") for index in range(shards_count)}
+        agencies = {f"{index + 1:04d}": f"s{index}" for index in range(shards_count)}
+        router = db.ShardRouter(shards, agencies)
+        router.create_tables()
+        router.save(config_path)
+        router.add_client("00000000000", "Cliente Benchmark", "01-01-1990", "Rua do Benchmark", "0001")
+        agency_list = list(agencies)
+        accounts = [router.add_account(agency_list[index % shards_count], 0, "00000000000") for index in range(processes_count)]
+        db.close_all_pools() # os processos abrem as proprias conexões
+
+        start_event = multiprocessing.Event()
+        processes = [multiprocessing.Process(target=worker, args=(config_path, number, per_process, start_event))
+                     for number in accounts]
+        for process in processes:
+            process.start()
+        time.sleep(0.5) # espera os processos subirem
+        start = time.perf_counter()
+        start_event.set()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        total = sum(account['balance'].cents for account in router.get_accounts_by_client("00000000000")) // 100
+        router.close()
+        db.close_all_pools()
+    return elapsed, total
+
+def main():
+    per_process = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    processes_count = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    shards_options = [int(arg) for arg in sys.argv[3:]] or [1, 2, 4]
+    for shards_count in shards_options:
+        elapsed, total = run(shards_count, processes_count, per_process)
+        print(f"{shards_count:>2} shards, {processes_count} processos: {total} lançamentos em {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Mede o custo por chamada dos métodos genéricos do DataBaseManager (select/update por chave),
+com e sem a memorização do SQL gerado e o cache de statements preparados das conexões.
+Uso: python -m benchmarks.bench_sql_cache [chamadas]
+"""
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from engine import database as db
+from engine.connection_pool import configure_pool
+
+SQL_BUILDERS = ('_insert_sql', '_update_sql', '_delete_sql', '_select_sql')
+
+@contextmanager
+def without_sql_cache():
+    """Troca as funções memorizadas pelas originais (SQL montado a cada chamada)."""
+    originals = {name: getattr(db, name) for name in SQL_BUILDERS}
+    for name, func in originals.items():
+        setattr(db, name, func.__wrapped__)
+    try:
+        yield
+    finally:
+        for name, func in originals.items():
+            setattr(db, name, func)
+
+def per_call_us(calls, account_number):
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        start = time.perf_counter()
+        for _ in range(calls):
+            manager.select('accounts', columns='balance', condition={'number': account_number}, fetch_one=True)
+            manager.update('accounts', {'withdraw_limit': 3}, {'number': account_number})
+        elapsed = time.perf_counter() - start
+    return elapsed / (calls * 2) * 1e6
+
+def build_only_us(calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        db._select_sql('accounts', 'balance', ('number',), None, (), False)
+        db._update_sql('accounts', ('withdraw_limit',), ('number',))
+    return (time.perf_counter() - start) / (calls * 2) * 1e6
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with tempfile.TemporaryDirectory() as folder:
+        db.DB_PATH = str(Path(folder) / "bench_sql.db")
+        db.create_project_tables()
+        db.add_client("00000000000", "Cliente Benchmark", "01-01-1990", "Rua do Benchmark")
+        account_number = db.add_account("0001", 0, "00000000000")
+
+        # antes: SQL montado a cada chamada e conexões sem cache de statements
+        with without_sql_cache():
+            before_build = build_only_us(calls)
+            configure_pool(db.DB_PATH, db.DB_PROFILE, cached_statements=0)
+            before_call = per_call_us(calls, account_number)
+
+        # depois: SQL memorizado e cache de statements padrão do pool
+        after_build = build_only_us(calls)
+        configure_pool(db.DB_PATH, db.DB_PROFILE)
+        after_call = per_call_us(calls, account_number)
+        db.close_all_pools()
+
+    print(f"montagem do SQL:  antes {before_build:.2f} us  depois {after_build:.2f} us")
+    print(f"chamada completa: antes {before_call:.2f} us  depois {after_call:.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Mede a vazão de depósitos concorrentes (post_transaction) com varias threads,
+todas passando pela fila de escrita com group commit.
+Uso: python -m benchmarks.bench_writer_queue [lancamentos_por_thread] [threads...]
+"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from engine import database as db
+
+def run(threads_count, per_thread):
+    with tempfile.TemporaryDirectory() as folder:
+        db.DB_PATH = str(Path(folder) / "bench_writer.db")
+        db.create_project_tables()
+        db.add_client("00000000000", "Cliente Benchmark", "01-01-1990", "Rua do Benchmark")
+        accounts = [db.add_account("0001", 0, "00000000000") for _ in range(threads_count)]
+
+        def worker(account_number):
+            for _ in range(per_thread):
+                db.post_transaction(account_number, db.DEPOSIT, 1)
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in accounts]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        db.close_all_pools()
+    return elapsed
+
+def main():
+    per_thread = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    threads_options = [int(arg) for arg in sys.argv[2:]] or [1, 4, 16]
+    for threads_count in threads_options:
+        total = threads_count * per_thread
+        elapsed = run(threads_count, per_thread)
+        print(f"{threads_count:>3} threads: {total} lançamentos em {elapsed:.2f}s ({total / elapsed:.0f}/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,14 @@
 from abc import ABC, abstractmethod
+from engine.money import Money
+from engine import events
 
 class Account:
     def __init__(self, number, client):
-        self._balance = 0
+        self._balance = Money(0)
         self._number = number
         self._agency = "0001"
         self._client = client
+        self.recent_transactions = [] # ultimas transações no momento em que a conta foi carregada (load_client_graph)
 
     @classmethod
     def new_account(cls, client, number):
@@ -28,24 +31,26 @@ class Account:
         return self._client
 
     def withdraw(self, value):
+        value = Money(value)
         balance = self.balance
         exceeded_balance = value > balance
 
         if exceeded_balance:
-            print("\n@@@ Operação falhou! Você não tem saldo suficiente. @@@")
+            events.emit(events.WARNING, 'account.insufficient_balance', "@@@ Operação falhou! Você não tem saldo suficiente. @@@", account=self.number)
         elif value > 0:
             self._balance -= value
-            print("\n=== Saque realizado com sucesso! ===")
+            events.emit(events.INFO, 'account.withdraw', "=== Saque realizado com sucesso! ===", account=self.number, value=value)
             return True
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@")
+            events.emit(events.WARNING, 'account.invalid_value', "@@@ Operação falhou! O valor informado é inválido. @@@", account=self.number, value=value)
         return False
 
     def deposit(self, value):
+        value = Money(value)
         if value > 0:
             self._balance += value
-            print("\n=== Depósito realizado com sucesso! ===")
+            events.emit(events.INFO, 'account.deposit', "=== Depósito realizado com sucesso! ===", account=self.number, value=value)
             return True
         else:
-            print("\n@@@ Operação falhou! O valor informado é inválido. @@@")
+            events.emit(events.WARNING, 'account.invalid_value', "@@@ Operação falhou! O valor informado é inválido. @@@", account=self.number, value=value)
             return False
\ No newline at end of file
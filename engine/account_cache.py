@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_CLIENTS = 256
+DEFAULT_TTL = 60.0
+
+class AccountCache():
+    """
+    Cache dos clientes já hidratados (Individual com as CheckingAccount), por CPF e por numero de conta.
+    Guarda no maximo 'max_clients' clientes (os menos usados saem primeiro) e cada um vale por 'ttl' segundos.
+    O caminho de lançamento mantém o cache em dia: o saldo novo é gravado no objeto em cache (write-through)
+    e operações que ele não acompanha (contas novas, lotes) invalidam as entradas afetadas.
+    """
+
+    def __init__(self, max_clients=DEFAULT_MAX_CLIENTS, ttl=DEFAULT_TTL, clock=time.monotonic):
+        """
+        :param max_clients: Quantidade maxima de clientes em memoria.
+        :param ttl: Segundos que uma entrada vale; None para não expirar.
+        :param clock: Relogio usado para o TTL (trocado nos testes).
+        """
+        self.max_clients = max_clients
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._clients = OrderedDict() # cpf -> (cliente, expira_em)
+        self._accounts = {} # numero da conta -> cpf
+        self._lock = threading.Lock()
+
+    def get_client(self, cpf):
+        """Cliente em cache, ou None (conta como miss) se não está ou expirou."""
+        with self._lock:
+            entry = self._clients.get(cpf)
+            if entry is not None and (entry[1] is None or entry[1] > self.clock()):
+                self._clients.move_to_end(cpf)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                self._remove(cpf)
+            self.misses += 1
+            return None
+
+    def get_account(self, account_number):
+        """CheckingAccount em cache pelo numero, ou None."""
+        with self._lock:
+            cpf = self._accounts.get(account_number)
+            if cpf is None:
+                self.misses += 1
+                return None
+        client = self.get_client(cpf)
+        if client is None:
+            return None
+        return next((account for account in client.accounts if account.number == account_number), None)
+
+    def put(self, client):
+        """Guarda o cliente hidratado (e indexa as contas dele)."""
+        with self._lock:
+            if client.cpf in self._clients:
+                self._remove(client.cpf)
+            expires_at = None if self.ttl is None else self.clock() + self.ttl
+            self._clients[client.cpf] = (client, expires_at)
+            for account in client.accounts:
+                self._accounts[account.number] = client.cpf
+            while len(self._clients) > self.max_clients:
+                self._remove(next(iter(self._clients)))
+
+    def update_balance(self, account_number, new_balance, withdrawal=False):
+        """
+        Write-through do lançamento: grava o saldo novo na conta em cache, se ela estiver lá.
+        Com withdrawal=True, também conta mais um saque do dia.
+        Retorna a conta em cache que foi atualizada, ou None.
+        """
+        with self._lock:
+            cpf = self._accounts.get(account_number)
+            entry = self._clients.get(cpf) if cpf is not None else None
+            if entry is None:
+                return None
+            for account in entry[0].accounts:
+                if account.number == account_number:
+                    account._balance = new_balance
+                    if withdrawal:
+                        account._withdrawals_today += 1
+                    return account
+            return None
+
+    def invalidate_client(self, cpf):
+        with self._lock:
+            self._remove(cpf)
+
+    def invalidate_account(self, account_number):
+        """Tira do cache o cliente dono da conta."""
+        with self._lock:
+            cpf = self._accounts.get(account_number)
+            if cpf is not None:
+                self._remove(cpf)
+
+    def clear(self):
+        with self._lock:
+            self._clients.clear()
+            self._accounts.clear()
+
+    def stats(self):
+        """Contadores do cache: {'hits', 'misses', 'size'}."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._clients)}
+
+    def _remove(self, cpf):
+        entry = self._clients.pop(cpf, None)
+        if entry is not None:
+            for account in entry[0].accounts:
+                if self._accounts.get(account.number) == cpf:
+                    del self._accounts[account.number]
@@ -0,0 +1,116 @@
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from engine import database
+from engine.money import Money
+from engine.writer_queue import get_writer
+
+DEFAULT_READERS = 4 # com a thread da fila de escrita, ocupa as 5 conexões do pool padrão
+DEFAULT_MAX_PENDING = 1000
+
+class AsyncDatabase():
+    """
+    Versão asyncio das funções de engine/database.py.
+    Todas as escritas vão para a fila de escrita do arquivo (engine/writer_queue.py), o unico
+    escritor, que as confirma em grupo; as leituras passam por um pequeno grupo de threads,
+    todas usando o pool de conexões.
+    Cada lado aceita no maximo 'max_pending' chamadas em andamento: passado disso,
+    quem chama fica esperando (await) em vez de empilhar trabalho sem limite.
+    """
+
+    def __init__(self, readers=DEFAULT_READERS, max_pending=DEFAULT_MAX_PENDING):
+        """
+        :param readers: Threads de leitura (não passe do tamanho do pool de conexões menos 1).
+        :param max_pending: Chamadas em andamento por lado (escrita/leitura) antes de segurar os novos pedidos.
+        """
+        self.max_pending = max_pending
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+        self._write_slots = asyncio.Semaphore(max_pending)
+        self._read_slots = asyncio.Semaphore(max_pending)
+
+    async def _run(self, executor, slots, func, *args, **kwargs):
+        async with slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+    async def _write(self, func, *args, **kwargs):
+        """Enfileira func(db, ...) na fila de escrita do arquivo e espera o commit, sem ocupar thread nenhuma."""
+        async with self._write_slots:
+            return await asyncio.wrap_future(get_writer(database.DB_PATH).submit(func, *args, **kwargs))
+
+    async def _read(self, func, *args, **kwargs):
+        return await self._run(self._readers, self._read_slots, func, *args, **kwargs)
+
+    # escritas
+
+    async def add_client(self, cpf, name, birth_date, address):
+        return await self._write(database._add_client, cpf, name, birth_date, address)
+
+    async def add_account(self, agency, balance, client_cpf):
+        return await self._write(database._add_account, agency, balance, client_cpf)
+
+    async def add_transaction(self, account_number, transaction_type, value):
+        return await self._write(database._add_transaction, account_number, transaction_type, value)
+
+    async def post_transaction(self, account_number, transaction_type, value):
+        # os lançamentos concorrentes saem no mesmo commit da fila
+        value = Money(value)
+        if value <= 0:
+            return None
+        return await self._write(database._post, account_number, transaction_type, value)
+
+    async def post_batch(self, entries, group_size=1000):
+        # igual ao database.post_batch: cada grupo é uma escrita na fila e ocupa uma vaga como as outras
+        accepted = 0
+        rejected = []
+        entries = iter(entries)
+        while True:
+            group = list(itertools.islice(entries, group_size))
+            if not group:
+                break
+            group_accepted, group_rejected = await self._write(database._post_group, group)
+            accepted += group_accepted
+            rejected.extend(group_rejected)
+        return accepted, rejected
+
+    async def delete_client(self, cpf):
+        return await self._write(database._delete_client, cpf)
+
+    async def delete_account(self, account_number):
+        return await self._write(database._delete_account, account_number)
+
+    # leituras
+
+    async def get_client_by_cpf(self, cpf):
+        return await self._read(database.get_client_by_cpf, cpf)
+
+    async def get_accounts_by_client(self, cpf):
+        return await self._read(database.get_accounts_by_client, cpf)
+
+    async def get_all_clients(self):
+        return await self._read(database.get_all_clients)
+
+    async def get_transactions_by_account(self, account_number, start_date=None, end_date=None):
+        return await self._read(database.get_transactions_by_account, account_number, start_date=start_date, end_date=end_date)
+
+    async def count_transactions(self, account_number):
+        return await self._read(database.count_transactions, account_number)
+
+    async def get_statement_page(self, account_number, after_id=0, limit=100, start_date=None, end_date=None):
+        return await self._read(database.get_statement_page, account_number, after_id=after_id, limit=limit,
+                                start_date=start_date, end_date=end_date)
+
+    async def get_balance_at(self, account_number, timestamp):
+        return await self._read(database.get_balance_at, account_number, timestamp)
+
+    def close(self):
+        """Espera as leituras em andamento terminarem e encerra as threads (a fila de escrita é fechada por database.close_all_pools)."""
+        self._readers.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
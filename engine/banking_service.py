@@ -0,0 +1,127 @@
+import time
+from datetime import date
+
+from engine import database as db
+from engine.checkingAccount import CheckingAccount
+from engine.money import Money
+from engine.account_cache import AccountCache
+
+MINIMUM_AGE = 18
+DEFAULT_AGENCY = "0001"
+RECENT_TRANSACTIONS = 10 # transações carregadas junto com cada conta
+
+class BankingService():
+    """
+    Regras de negocio do banco sem nenhuma dependencia de interface grafica:
+    cadastro, carregamento de clientes, depósito, saque e extrato como chamadas simples.
+    A janela (app.py), os benchmarks e os jobs em lote usam esta mesma classe.
+    """
+
+    def __init__(self, event_log=None, cache=None):
+        """
+        :param event_log: EventLog opcional onde as operações são registradas.
+        :param cache: AccountCache dos clientes hidratados (padrão: um novo, com as opções padrão).
+        """
+        self.event_log = event_log
+        self.cache = cache if cache is not None else AccountCache()
+
+    def _record(self, event_type, **fields):
+        if self.event_log is not None:
+            self.event_log.record(event_type, **fields)
+
+    @staticmethod
+    def client_age(birth_date, today=None):
+        """Idade em anos completos na data 'today' (padrão: hoje)."""
+        today = today or date.today()
+        return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+    def create_client(self, cpf, name, birth_date, address):
+        """
+        Cadastra um cliente. 'birth_date' é um date.
+        Retorna True se criou, False se o CPF já existe; levanta ValueError para menores de idade.
+        """
+        age = self.client_age(birth_date)
+        if age < MINIMUM_AGE:
+            raise ValueError(f"O cliente deve ter no mínimo {MINIMUM_AGE} anos. Idade calculada: {age} anos.")
+
+        created = db.add_client(cpf, name, birth_date.strftime("%d-%m-%Y"), address)
+        if created:
+            self._record("cliente_criado", cpf=cpf)
+        return created
+
+    def create_account(self, cpf, agency=DEFAULT_AGENCY):
+        """Abre uma conta com saldo zero. Retorna o numero da conta, ou None se o cliente não existe."""
+        account_number = db.add_account(agency=agency, balance=0, client_cpf=cpf)
+        if account_number:
+            self.cache.invalidate_client(cpf) # o cliente em cache não tem a conta nova
+            self._record("conta_criada", cpf=cpf, account_number=account_number)
+        return account_number
+
+    def load_client(self, cpf):
+        """
+        Retorna o Individual com as contas (CheckingAccount) já hidratadas, ou None se o CPF não existe.
+        Clientes carregados recentemente vêm do cache, sem ir ao banco.
+        """
+        client = self.cache.get_client(cpf)
+        if client is not None:
+            return client
+
+        # cliente, contas e ultimas transações numa consulta só
+        client = db.load_client_graph(cpf, last_n=RECENT_TRANSACTIONS)
+        if client is None:
+            return None
+        self.cache.put(client)
+        return client
+
+    def deposit(self, account, value):
+        """
+        Deposita na conta ('account' pode ser a CheckingAccount ou só o numero).
+        Retorna o novo saldo, ou None se o depósito foi recusado.
+        """
+        return self._post(account, db.DEPOSIT, value, "deposito")
+
+    def withdraw(self, account, value):
+        """
+        Saca da conta ('account' pode ser a CheckingAccount ou só o numero).
+        Retorna o novo saldo, ou None se o saque foi recusado (saldo ou limite).
+        """
+        return self._post(account, db.WITHDRAW, value, "saque")
+
+    def _post(self, account, transaction_type, value, event_type):
+        """Grava a operação no banco (um commit só) e sincroniza o objeto da conta, se houver."""
+        value = Money(value)
+        account_number = getattr(account, 'number', account)
+
+        start = time.perf_counter()
+        new_balance = db.post_transaction(account_number, transaction_type, value)
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        client = getattr(account, 'client', None)
+        self._record(event_type if new_balance is not None else f"{event_type}_recusado",
+                     cpf=getattr(client, 'cpf', None), account_number=account_number, value=value, latency_ms=latency_ms)
+
+        if new_balance is not None:
+            withdrawal = transaction_type == db.WITHDRAW
+            cached = self.cache.update_balance(account_number, new_balance, withdrawal=withdrawal)
+            if isinstance(account, CheckingAccount) and account is not cached: # o objeto em cache já foi atualizado
+                account._balance = new_balance # o objeto passa a refletir o saldo real do banco
+                if withdrawal:
+                    account._withdrawals_today += 1
+        return new_balance
+
+    def statement(self, account, after_id=0, limit=100, start_date=None, end_date=None):
+        """Uma pagina do extrato (veja database.get_statement_page)."""
+        account_number = getattr(account, 'number', account)
+        return db.get_statement_page(account_number, after_id=after_id, limit=limit, start_date=start_date, end_date=end_date)
+
+    def statement_count(self, account):
+        """Total de transações da conta (usado para mostrar o progresso do extrato)."""
+        return db.count_transactions(getattr(account, 'number', account))
+
+    def post_batch(self, entries, group_size=1000, profile=None):
+        """Liquidação em lote: (numero_conta, tipo, valor) -> (aceitos, recusados)."""
+        try:
+            return db.post_batch(entries, group_size=group_size, profile=profile)
+        finally:
+            self.cache.clear() # o lote mexe em saldos de muitas contas de uma vez
+
@@ -1,20 +1,39 @@
 from engine.account import Account
 from engine.withdraw import Withdraw
+from engine.money import Money
+from engine import events
 import textwrap
 
 class CheckingAccount(Account):
     def __init__(self, number, client, limit=500, withdrawn_limit=3):
         super().__init__(number, client)
-        self._limit = limit
+        self._limit = Money(limit)
         self._withdrawn_limit = withdrawn_limit
+        self._withdrawals_today = 0 # saques já feitos hoje (hidratado do banco em daily_withdrawals)
+
+    @property
+    def withdrawals_today(self):
+        return self._withdrawals_today
 
     def withdraw(self, value):
+        value = Money(value)
         exceeded_limit = value > self._limit
         if exceeded_limit:
-            print(f"!!! Operação não permitida: valor do saque (R$ {value:.2f}) é maior que o seu limite de (R$ {self._limit:.2f}).")
+            events.emit(events.WARNING, 'account.limit_exceeded',
+                        "!!! Operação não permitida: valor do saque (R$ {value:.2f}) é maior que o seu limite de (R$ {limit:.2f}).",
+                        account=self.number, value=value, limit=self._limit)
+            return False
+
+        if self._withdrawals_today >= self._withdrawn_limit:
+            events.emit(events.WARNING, 'account.daily_limit_reached',
+                        "!!! Operação não permitida: limite de {limit} saques por dia atingido.",
+                        account=self.number, limit=self._withdrawn_limit)
+            return False
+
+        if not super().withdraw(value):
             return False
-        
-        return super().withdraw(value)
+        self._withdrawals_today += 1
+        return True
     
     def __str__(self):
         return f"""\
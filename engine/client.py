@@ -1,3 +1,5 @@
+from engine import events
+
 class Client:
     def __init__(self, address):
         self.address = address
@@ -7,10 +9,10 @@ class Client:
     def perform_transaction(self, account, transaction):
         transaction_sucess = False
         try :
-            print(f"\nIniciando a operação {transaction.__class__.__name__}...")
+            events.emit(events.DEBUG, 'client.transaction_started', "Iniciando a operação {operation}...", operation=transaction.__class__.__name__)
             transaction_sucess = transaction.register(account)
         except Exception as exc:
-            print(f"Falha critica na transação! Ocorreu um erro inesperado : {exc} @@@")
+            events.emit(events.ERROR, 'client.transaction_failed', "Falha critica na transação! Ocorreu um erro inesperado : {error} @@@", error=exc)
 
         return transaction_sucess
     
@@ -0,0 +1,205 @@
+import sqlite3
+import threading
+import time
+from queue import Queue, Empty
+
+from engine.money import register_sqlite_types
+
+register_sqlite_types()
+
+DEFAULT_POOL_SIZE = 5
+DEFAULT_CACHED_STATEMENTS = 256 # statements preparados guardados por conexão (o padrão do sqlite3 é 128)
+
+# Perfis de durabilidade: pragmas aplicados uma unica vez, quando a conexão é aberta.
+# A ordem importa: journal_mode precisa vir antes de qualquer transação.
+#  - strict:   WAL + fsync a cada commit, nada confirmado se perde numa queda de energia
+#  - balanced: WAL + synchronous=NORMAL, fsync só no checkpoint (pode perder os últimos commits, nunca corrompe)
+#  - bulk:     para importações, sem fsync e com cache maior; use só quando o arquivo puder ser refeito
+PROFILES = {
+    'strict': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,   # valor negativo = tamanho em KiB (16 MB)
+        'mmap_size': 268435456, # 256 MB
+        'foreign_keys': 'ON',   # vale por conexão: sem isso as chaves estrangeiras (e o ON DELETE CASCADE) são ignoradas
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'temp_store': 'MEMORY',
+        'cache_size': -16000,
+        'mmap_size': 268435456,
+        'foreign_keys': 'ON',
+    },
+    'bulk': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'busy_timeout': 30000,
+        'temp_store': 'MEMORY',
+        'cache_size': -262144,  # 256 MB
+        'mmap_size': 1073741824, # 1 GB
+        'foreign_keys': 'ON',
+    },
+}
+DEFAULT_PROFILE = 'balanced'
+
+def profile_pragmas(profile):
+    """Retorna uma cópia dos pragmas de um perfil de durabilidade."""
+    if profile not in PROFILES:
+        raise ValueError(f"Perfil de durabilidade desconhecido: {profile}. Use um de {sorted(PROFILES)}.")
+    return dict(PROFILES[profile])
+
+class ConnectionPool():
+    """Mantém um conjunto de conexões abertas com o mesmo arquivo de banco de dados."""
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, timeout=5.0, profile=DEFAULT_PROFILE, pragmas=None, health_check_interval=30.0,
+                 cached_statements=DEFAULT_CACHED_STATEMENTS):
+        """
+        :param db_path: Caminho do arquivo do banco de dados.
+        :param size: Número máximo de conexões abertas ao mesmo tempo.
+        :param timeout: Segundos esperando uma conexão livre (e o lock do sqlite).
+        :param profile: Nome do perfil de durabilidade (veja PROFILES).
+        :param pragmas: Dicionário {pragma: valor} que sobrescreve os pragmas do perfil.
+        :param health_check_interval: Conexões paradas há mais tempo que isso são testadas antes do uso.
+        :param cached_statements: Quantos statements preparados cada conexão reaproveita (pelo texto do SQL).
+        """
+        if size < 1:
+            raise ValueError("O pool precisa de pelo menos uma conexão.")
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.profile = profile
+        self.pragmas = profile_pragmas(profile)
+        self.pragmas.update(pragmas or {})
+        self.health_check_interval = health_check_interval
+        self.cached_statements = cached_statements
+        self._idle = Queue(maxsize=size) # guarda tuplas (conexao, momento em que foi devolvida)
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def opened(self):
+        """Quantidade de conexões abertas (livres + em uso)."""
+        return self._opened
+
+    def _connect(self):
+        """Abre uma conexão nova e aplica os pragmas uma vez só."""
+        # PARSE_DECLTYPES faz as colunas MONEY voltarem como Money; como as conexões vivem no pool,
+        # o cache de statements preparados é reaproveitado entre as chamadas
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False,
+                               detect_types=sqlite3.PARSE_DECLTYPES, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _is_healthy(self, conn):
+        """Verifica se a conexão ainda responde."""
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        """Fecha a conexão e libera a vaga dela no pool."""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    def acquire(self):
+        """Pega uma conexão livre, abrindo uma nova se o pool ainda não estiver cheio."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("O pool de conexões já foi fechado.")
+
+        try:
+            conn, released_at = self._idle.get_nowait()
+        except Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    return self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            try:
+                conn, released_at = self._idle.get(timeout=self.timeout)
+            except Empty:
+                raise sqlite3.OperationalError(f"Nenhuma conexão livre após {self.timeout}s (pool com {self.size}).")
+
+        # só testa a conexão se ela ficou parada muito tempo
+        if time.monotonic() - released_at > self.health_check_interval and not self._is_healthy(conn):
+            self._discard(conn)
+            with self._lock:
+                self._opened += 1
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool, desfazendo qualquer transação esquecida."""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put_nowait((conn, time.monotonic()))
+
+    def close(self):
+        """Fecha todas as conexões livres. As que estão em uso são fechadas quando voltarem."""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except Empty:
+                break
+            self._discard(conn)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path, profile=DEFAULT_PROFILE, size=DEFAULT_POOL_SIZE):
+    """Retorna o pool do arquivo/perfil informado, criando na primeira chamada."""
+    with _pools_lock:
+        pool = _pools.get((db_path, profile))
+        if pool is None:
+            pool = ConnectionPool(db_path, size=size, profile=profile)
+            _pools[(db_path, profile)] = pool
+        return pool
+
+def configure_pool(db_path, profile=DEFAULT_PROFILE, **options):
+    """Troca o pool de um arquivo/perfil por um novo com outras opções (tamanho, timeout, pragmas...)."""
+    key = (db_path, profile)
+    with _pools_lock:
+        old_pool = _pools.pop(key, None)
+        _pools[key] = ConnectionPool(db_path, profile=profile, **options)
+    if old_pool:
+        old_pool.close()
+    return _pools[key]
+
+def close_all_pools():
+    """Fecha todos os pools abertos (útil no fim dos testes ou ao encerrar o app)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
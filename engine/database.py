@@ -1,28 +1,93 @@
+import bisect
+import csv
+import json
+import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+
+from engine import connection_pool
+from engine.connection_pool import get_pool
+from engine import events
+from engine.individual import Individual
+from engine.checkingAccount import CheckingAccount
+from engine.deposit import Deposit
+from engine.withdraw import Withdraw
+from engine.money import Money
+
+# O SQL gerado pelos métodos genéricos do DataBaseManager é memorizado por (operação, tabela, colunas):
+# o mesmo texto sai sempre igual, sem montar a string a cada chamada, e o sqlite3 acha o statement
+# já preparado no cache da conexão do pool.
+SQL_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _insert_sql(table_name, columns):
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _update_sql(table_name, set_columns, condition_columns):
+    set_clause = ', '.join([f"{key} = ?" for key in set_columns])
+    condition_clause = ' AND '.join([f"{key} = ?" for key in condition_columns])
+    return f"UPDATE {table_name} SET {set_clause} WHERE {condition_clause}"
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _delete_sql(table_name, condition_columns):
+    condition_clause = ' AND '.join([f"{key} = ?" for key in condition_columns])
+    return f"DELETE FROM {table_name} WHERE {condition_clause}"
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _select_sql(table_name, columns, condition_columns, order_by, joins, has_limit):
+    query = f"SELECT {columns} FROM {table_name}"
+    for join_type, join_table, on_clause in joins:
+        query += f" {join_type} {join_table} ON {on_clause}"
+    if condition_columns:
+        condition_clause = ' AND '.join([f"{key} = ?" for key in condition_columns])
+        query += f" WHERE {condition_clause}"
+
+    # adição feita para o extrato
+    if order_by:
+        query += f" ORDER BY {order_by}"
+    if has_limit:
+        query += " LIMIT ?"
+    return query
 
 class DataBaseManager():
     """Classe pra gerenciar"""
 
-    def __init__(self, db_path):
-        """Caminho do arquivo do banco de dados"""
+    def __init__(self, db_path, pool=None, profile=None):
+        """
+        Caminho do arquivo do banco de dados.
+        :param pool: Pool de conexões a usar (opcional).
+        :param profile: Perfil de durabilidade ('strict', 'balanced', 'bulk'); padrão é DB_PROFILE.
+        """
         self.db_path = db_path
+        self.pool = pool
+        self.profile = profile
         self.conn = None
 
     def __enter__(self):
-        """faz conexao com o banco ao entrar no bloco 'with'."""
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.row_factory = sqlite3.Row #não me devolve tuplas. Em vez disso, me devolve objetos especiais do tipo sqlite3.Row para cada linha. (dict)
+        """pega uma conexao do pool ao entrar no bloco 'with'."""
+        if self.pool is None:
+            self.pool = get_pool(self.db_path, self.profile or DB_PROFILE)
+        # a conexão já vem com row_factory = sqlite3.Row e os pragmas aplicados pelo pool
+        self.conn = self.pool.acquire()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """fecha a conexao ao sair do bloco 'with'."""
+        """finaliza a transação e devolve a conexao ao pool ao sair do bloco 'with'."""
         if self.conn:
-            if exc_type is not None:
-                self.conn.rollback() # rollback pra desfazer tudo
-            else:
-                self.conn.commit()
-        self.conn.close()
+            try:
+                if exc_type is not None:
+                    self.conn.rollback() # rollback pra desfazer tudo
+                else:
+                    self.conn.commit()
+            finally:
+                self.pool.release(self.conn)
+                self.conn = None
     
     def execute_query(self, query, params=()):
         """uma query pra uso interno"""
@@ -40,7 +105,32 @@ class DataBaseManager():
         columns_with_types = [f"{name} {definition}" for name, definition in columns.items()]
         query = f"CREATE TABLE IF NOT EXISTS {table_name} ({', '.join(columns_with_types)})"
         self.execute_query(query)
-        print(f"Tabela '{table_name}' criada ou já existente.")
+        events.emit(events.INFO, 'db.table_created', "Tabela '{table}' criada ou já existente.", table=table_name)
+
+    def add_column(self, table_name, column_name, definition):
+        """
+        Adiciona uma coluna a uma tabela já existente (não faz nada se ela já existir).
+        Retorna True se a coluna foi criada agora.
+        """
+        existing = {row['name'] for row in self.execute_query(f"PRAGMA table_info({table_name})")}
+        if column_name in existing:
+            return False
+        self.execute_query(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+        events.emit(events.INFO, 'db.column_added', "Coluna '{column}' adicionada em '{table}'.", table=table_name, column=column_name)
+        return True
+
+    def create_index(self, index_name, table_name, columns, unique=False):
+        """
+        Cria um indice de forma genérica (não faz nada se ele já existir).
+        :param index_name: Nome do indice.
+        :param table_name: Tabela indexada.
+        :param columns: Lista de colunas, na ordem do indice. Ex: ['account_number', 'id']
+        :param unique: Se True, cria um indice UNIQUE.
+        """
+        unique_clause = "UNIQUE " if unique else ""
+        query = f"CREATE {unique_clause}INDEX IF NOT EXISTS {index_name} ON {table_name} ({', '.join(columns)})"
+        self.execute_query(query)
+        events.emit(events.INFO, 'db.index_created', "Indice '{index}' criado ou já existente.", index=index_name, table=table_name)
 
     def insert(self, table_name, data):
         """
@@ -48,14 +138,21 @@ class DataBaseManager():
         :param table_name: Nome da tabela.
         :param data: Um dicionario com {nome_coluna: valor}.
         """
-
-        columns = ', '.join(data.keys())
-        placeholders = ', '.join(['?'] * len(data))
-        query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        query = _insert_sql(table_name, tuple(data))
         cursor = self.execute_query(query, tuple(data.values()))
-        print(f"Registro inserido em '{table_name}'.")
+        events.emit(events.DEBUG, 'db.row_inserted', "Registro inserido em '{table}'.", table=table_name)
         return cursor.lastrowid    ## A propriedade cursor.lastrowid guarda o valor da coluna PRIMARY KEY gerado automaticamente pelo banco na última inserção.
 
+    def insert_many(self, table_name, columns, rows):
+        """
+        Insere varios registros de uma vez com executemany (sem mensagem por linha).
+        :param table_name: Nome da tabela.
+        :param columns: Sequencia com os nomes das colunas.
+        :param rows: Iteravel de tuplas, na mesma ordem de 'columns'.
+        """
+        cursor = self.conn.executemany(_insert_sql(table_name, tuple(columns)), rows)
+        return cursor.rowcount
+
     def update(self, table_name, data, condition):
         """
         Atualiza registros em uma tabela.
@@ -63,12 +160,10 @@ class DataBaseManager():
         :param data: Um dicionário com {nome_coluna: novo_valor}.
         :param condition: Um dicionário para a cláusula WHERE, ex: {'id': 1}.
         """
-        set_clause = ', '.join([f"{key} = ?" for key in data.keys()])
-        condition_clause = ' AND '.join([f"{key} = ?" for key in condition.keys()])
-        query = f"UPDATE {table_name} SET {set_clause} WHERE {condition_clause}"
+        query = _update_sql(table_name, tuple(data), tuple(condition))
         paramns = tuple(data.values()) + tuple(condition.values())
         self.execute_query(query, paramns)
-        print(f"Registro em '{table_name}' atualizado.")
+        events.emit(events.DEBUG, 'db.row_updated', "Registro em '{table}' atualizado.", table=table_name)
 
     def delete(self, table_name, condition):
         """
@@ -79,97 +174,173 @@ class DataBaseManager():
         if not condition or len(condition) == 0:
             raise ValueError("Para evitar desastres, é necessario uma condição.") ## raise lança a exceção e interrompe o programa.
         
-        condition_clause = ' AND '.join([f"{key} = ?" for key in condition.keys()])
-        query = f"DELETE FROM {table_name} WHERE {condition_clause}"
-        self.execute_query(query, tuple(condition.values()))
-        print(f"Registro em '{table_name}' deletado.")
+        self.execute_query(_delete_sql(table_name, tuple(condition)), tuple(condition.values()))
+        events.emit(events.DEBUG, 'db.row_deleted', "Registro em '{table}' deletado.", table=table_name)
 
-    def select(self, table_name, columns="*", condition=None, fetch_one=False, order_by=None):
+    def select(self, table_name, columns="*", condition=None, fetch_one=False, order_by=None, joins=None, limit=None):
         """
         Seleciona dados de uma tabela.
-        :param table_name: Nome da tabela.
+        :param table_name: Nome da tabela (pode ter apelido, ex: 'clients c').
         :param columns: String das colunas a selecionar (padrão '*').
-        :param condition: Dicionário para a cláusula WHERE (opcional).
+        :param condition: Dicionário para a cláusula WHERE (opcional). Com joins, use as colunas com o apelido, ex: {'c.cpf': cpf}.
         :param fetch_one: Se True, retorna apenas um registro, senão, todos.
+        :param joins: Lista de joins (opcional), cada um (tipo, tabela, condição_on) ou (tipo, tabela, condição_on, parametros).
+        Ex: [('LEFT JOIN', 'accounts a', 'a.client_cpf = c.cpf')]
+        :param limit: Quantidade maxima de linhas (opcional).
         """
-        query = f"SELECT {columns} FROM {table_name}"
-        params = ()
-        if condition:
-            condition_clause = ' AND '.join([f"{key} = ?" for key in condition.keys()])
-            query += f" WHERE {condition_clause}"
-            params = tuple(condition.values())
-        
-        # adição feita para o extrato
-        if order_by:
-            query += f" ORDER BY {order_by}"
-        
-        cursor = self.execute_query(query, params)
+        cursor = self.execute_query(*self._build_select(table_name, columns, condition, order_by, joins, limit))
 
         if fetch_one:
             return cursor.fetchone()
         return cursor.fetchall()
 
+    def iter_select(self, table_name, columns="*", condition=None, order_by=None, arraysize=500, joins=None):
+        """
+        Igual ao select, mas devolve um gerador que busca as linhas em blocos de 'arraysize' (fetchmany),
+        assim a memoria não cresce com o tamanho da tabela.
+        """
+        cursor = self.execute_query(*self._build_select(table_name, columns, condition, order_by, joins))
+        cursor.arraysize = arraysize
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield from rows
+
+    def _build_select(self, table_name, columns, condition, order_by, joins=None, limit=None):
+        """Monta a query (memorizada, veja _select_sql) e os parametros de um SELECT."""
+        params = ()
+        join_clauses = ()
+        for join in joins or ():
+            join_clauses += (tuple(join[:3]),)
+            if len(join) > 3:
+                params += tuple(join[3]) # parametros do join vêm antes dos do WHERE, na ordem da query
+        if condition:
+            params += tuple(condition.values())
+        if limit is not None:
+            params += (limit,)
+        query = _select_sql(table_name, columns, tuple(condition or ()), order_by, join_clauses, limit is not None)
+        return query, params
+
 DB_PATH = "banking.db"
+DB_PROFILE = "balanced" # perfil de durabilidade usado quando nenhum é informado
 
-def create_project_tables():
-    """Cria as tabelas 'clients' e 'accounts' para o projeto"""
-    with DataBaseManager(DB_PATH) as db:
-        client_columns = {
-            'cpf' : 'TEXT PRIMARY KEY',
-            'name' : 'TEXT NOT NULL',
-            'birth_date' : 'TEXT NOT NULL',
-            'address' : 'text not null'
-        }
-        db.create_table('clients', client_columns)
-
-        account_columns = {
-            'number' : 'INTEGER PRIMARY KEY AUTOINCREMENT',
-            'agency' : 'TEXT NOT NULL',
-            'balance' : 'REAL NOT NULL',
-            'client_cpf' : 'TEXT NOT NULL',
-            'limit_value' : 'REAL DEFAULT 500',
-            'withdraw_limit' : 'INTEGER DEFAULT 3',
-            'FOREIGN KEY (client_cpf)' : 'REFERENCES clients (cpf)'
-        }
-        db.create_table('accounts', account_columns)
-
-        transaction_columns = {
-            'id': 'INTEGER PRIMARY KEY AUTOINCREMENT',
-            'account_number': 'INTEGER NOT NULL',
-            'transaction_type': 'TEXT NOT NULL',
-            'value': 'REAL NOT NULL',
-            'date': 'TEXT NOT NULL',
-            'FOREIGN KEY (account_number)': 'REFERENCES accounts (number)'
-        }
-        db.create_table('transactions', transaction_columns)
-
-    print("Tabelas prontas.")
+# formato de transactions.date
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# tipos de transação gravados em transactions.transaction_type
+DEPOSIT = "Depósito"
+WITHDRAW = "Saque"
+
+# Esquemas das tabelas. Valores em dinheiro são MONEY: inteiro de centavos, lido de volta como Money.
+CLIENT_COLUMNS = {
+    'cpf' : 'TEXT PRIMARY KEY',
+    'name' : 'TEXT NOT NULL',
+    'birth_date' : 'TEXT NOT NULL',
+    'address' : 'text not null'
+}
+
+ACCOUNT_COLUMNS = {
+    'number' : 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'agency' : 'TEXT NOT NULL',
+    'balance' : 'MONEY NOT NULL',
+    'client_cpf' : 'TEXT NOT NULL',
+    'limit_value' : 'MONEY DEFAULT 50000', # R$ 500,00
+    'withdraw_limit' : 'INTEGER DEFAULT 3',
+    'archived_balance' : 'MONEY', # saldo corrente da ultima transação que foi para o arquivo morto
+    'archived_until' : 'TEXT', # transações com data anterior a esta estão no arquivo morto (NULL = nenhuma)
+    'FOREIGN KEY (client_cpf)' : 'REFERENCES clients (cpf) ON DELETE CASCADE'
+}
+
+TRANSACTION_COLUMNS = {
+    'id': 'INTEGER PRIMARY KEY AUTOINCREMENT',
+    'account_number': 'INTEGER NOT NULL',
+    'transaction_type': 'TEXT NOT NULL',
+    'value': 'MONEY NOT NULL',
+    'date': 'TEXT NOT NULL', # ISO 8601 'YYYY-mm-dd HH:MM:SS': ordena como texto e permite busca por intervalo no indice
+    'balance_after': 'MONEY', # saldo da conta logo depois desta transação
+    'FOREIGN KEY (account_number)': 'REFERENCES accounts (number) ON DELETE CASCADE'
+}
+
+# saques por conta e por dia, mantidos na mesma transação do lançamento;
+# a chave primaria (conta, dia) é o indice da consulta do limite diario
+DAILY_WITHDRAWAL_COLUMNS = {
+    'account_number': 'INTEGER NOT NULL',
+    'day': 'TEXT NOT NULL', # 'YYYY-mm-dd'
+    'count': 'INTEGER NOT NULL DEFAULT 0',
+    'PRIMARY KEY (account_number, day)': '',
+    'FOREIGN KEY (account_number)': 'REFERENCES accounts (number) ON DELETE CASCADE'
+}
+
+# colunas de dinheiro de cada tabela, usadas na migração de REAL (reais) para MONEY (centavos) em engine/migrations.py
+MONEY_COLUMNS = {
+    'accounts': ('balance', 'limit_value', 'archived_balance'),
+    'transactions': ('value', 'balance_after'),
+}
+
+def close_all_pools():
+    """Encerra as filas de escrita e fecha todos os pools (fim dos testes ou do app)."""
+    from engine.writer_queue import close_all_writers
+    close_all_writers()
+    connection_pool.close_all_pools()
+
+def create_project_tables(profile=None, db_path=None):
+    """
+    Cria as tabelas 'clients' e 'accounts' para o projeto (com o perfil de durabilidade informado)
+    :param db_path: Arquivo do banco (padrão: DB_PATH); usado pelo ShardRouter para criar cada shard.
+    """
+    db_path = db_path or DB_PATH
+    with DataBaseManager(db_path, profile=profile) as db:
+        db.create_table('clients', CLIENT_COLUMNS)
+        db.create_table('accounts', ACCOUNT_COLUMNS)
+        db.create_table('transactions', TRANSACTION_COLUMNS)
+        db.create_table('daily_withdrawals', DAILY_WITHDRAWAL_COLUMNS)
+
+    # bancos antigos são atualizados pelas migrações versionadas (em lotes, retomáveis);
+    # num banco novo elas só criam os indices e marcam a versão
+    from engine.migrations import run_migrations # import aqui dentro: migrations também importa este módulo
+    run_migrations(db_path, profile=profile)
+
+    events.emit(events.INFO, 'db.tables_ready', "Tabelas prontas.")
+
+def _write(func, *args, profile=None, **kwargs):
+    """
+    Roda func(db, *args, **kwargs) na fila de escrita do DB_PATH (engine/writer_queue.py) e espera o resultado.
+    Todas as escritas deste módulo passam pela fila: a thread dela é o unico escritor do arquivo,
+    então ninguem disputa o lock do sqlite com ela.
+    """
+    from engine.writer_queue import get_writer
+    return get_writer(DB_PATH, profile).submit(func, *args, **kwargs).result()
+
+def _add_client(db, cpf, name, birth_date, address):
+    try:
+        db.insert('clients', {
+            'cpf': cpf, 'name': name, 'birth_date': birth_date, 'address': address
+        })
+        return True
+    except sqlite3.IntegrityError:
+        #Erro se o cpf (primary key) ja estiver em uso
+        return False
+    except sqlite3.DatabaseError:
+        return False
 
 def add_client(cpf, name, birth_date, address):
     """Adiciona um novo client no banco"""
-    with DataBaseManager(DB_PATH) as db:
-        try:
-            db.insert('clients', {
-                'cpf': cpf, 'name': name, 'birth_date': birth_date, 'address': address
-            })
-            return True
-        except sqlite3.IntegrityError:
-            #Erro se o cpf (primary key) ja estiver em uso
-            return False
-        except sqlite3.DatabaseError:
-            return False
+    return _write(_add_client, cpf, name, birth_date, address)
+
+def _add_account(db, agency, balance, client_cpf):
+    #verificação
+    client = db.select('clients', condition={'cpf': client_cpf}, fetch_one=True)
+    if client:
+        new_account_number = db.insert('accounts', {
+            'agency': agency, 'balance': Money(balance), 'client_cpf': client_cpf
+        })
+        return new_account_number
+    return None #se o client não for encontrado vai retornar None
 
 def add_account(agency, balance, client_cpf):
     """Adiciona uma conta para um cliente existente"""
-    with DataBaseManager(DB_PATH) as db:
-        #verificação
-        client = db.select('clients', condition={'cpf': client_cpf}, fetch_one=True)
-        if client:
-            new_account_number = db.insert('accounts', {
-                'agency': agency, 'balance': balance, 'client_cpf': client_cpf
-            })
-            return new_account_number
-        return None #se o client não for encontrado vai retornar None
+    return _write(_add_account, agency, balance, client_cpf)
 
 def get_client_by_cpf(cpf):
     """Busca e retorna os dados do cliente pelo CPF."""
@@ -181,52 +352,751 @@ def get_accounts_by_client(cpf):
     with DataBaseManager(DB_PATH) as db:
         return db.select('accounts', condition={'client_cpf': cpf})
 
+# as ultimas N transações de cada conta, achadas pelo indice (account_number, id) de trás para frente:
+# só essas N linhas do extrato são lidas, por maior que seja o historico da conta
+_RECENT_TRANSACTIONS_ON = (
+    "t.account_number = a.number AND t.id IN "
+    "(SELECT id FROM transactions WHERE account_number = a.number ORDER BY id DESC LIMIT ?)"
+)
+
+def load_client_graph(cpf, last_n=10):
+    """
+    Carrega o cliente, as contas e as ultimas 'last_n' transações de cada conta numa única consulta.
+    Retorna o Individual com as CheckingAccount hidratadas (cada uma com 'recent_transactions',
+    da mais antiga para a mais nova), ou None se o CPF não existe.
+    """
+    with DataBaseManager(DB_PATH) as db:
+        rows = db.select(
+            'clients c',
+            columns="c.cpf, c.name, c.birth_date, c.address, a.number AS account_number, a.balance, a.limit_value, "
+                    "a.withdraw_limit, COALESCE(w.count, 0) AS withdrawals_today, t.id AS transaction_id, t.transaction_type, t.value, t.date, t.balance_after",
+            joins=[
+                ('LEFT JOIN', 'accounts a', 'a.client_cpf = c.cpf'),
+                ('LEFT JOIN', 'daily_withdrawals w', 'w.account_number = a.number AND w.day = ?', (_today(),)),
+                ('LEFT JOIN', 'transactions t', _RECENT_TRANSACTIONS_ON, (last_n,)),
+            ],
+            condition={'c.cpf': cpf},
+            order_by='a.number, t.id',
+        )
+    if not rows:
+        return None
+
+    first = rows[0]
+    client = Individual(name=first['name'], birth_date=first['birth_date'], cpf=first['cpf'], address=first['address'])
+    account = None
+    for row in rows:
+        if row['account_number'] is None:
+            break # cliente sem contas
+        if account is None or account.number != row['account_number']:
+            account = CheckingAccount(number=row['account_number'], client=client, limit=row['limit_value'], withdrawn_limit=row['withdraw_limit'])
+            account._balance = row['balance']
+            account._withdrawals_today = row['withdrawals_today']
+            client.add_account(account)
+        if row['transaction_id'] is not None:
+            account.recent_transactions.append({
+                'id': row['transaction_id'], 'transaction_type': row['transaction_type'],
+                'value': row['value'], 'date': row['date'], 'balance_after': row['balance_after'],
+            })
+    return client
+
 def get_all_clients():
     """Busca e retorna todos os clientes cadastrados."""
     with DataBaseManager(DB_PATH) as db:
         return db.select('clients')
 
+def iter_all_clients(arraysize=500):
+    """Percorre todos os clientes sem carregar a tabela inteira na memoria."""
+    with DataBaseManager(DB_PATH) as db:
+        yield from db.iter_select('clients', order_by='cpf', arraysize=arraysize)
+
+def iter_transactions(account_number=None, arraysize=500):
+    """Percorre as transações (de uma conta ou de todas, contando as do arquivo morto) em ordem de id, em blocos."""
+    condition = {'account_number': account_number} if account_number is not None else None
+    with DataBaseManager(DB_PATH) as db:
+        with _transactions_table(db, account_number) as table:
+            yield from db.iter_select(table, condition=condition, order_by='id ASC', arraysize=arraysize)
+
+def _export_csv(file_path, rows):
+    """Escreve as linhas em um CSV, usando as colunas da primeira linha como cabeçalho."""
+    count = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for row in rows:
+            if count == 0:
+                writer.writerow(row.keys())
+            writer.writerow(tuple(row))
+            count += 1
+    return count
+
+def export_clients_csv(file_path):
+    """Exporta todos os clientes para CSV. Retorna a quantidade de linhas exportadas."""
+    return _export_csv(file_path, iter_all_clients())
+
+def export_transactions_csv(file_path, account_number=None):
+    """Exporta as transações (de uma conta ou de todas) para CSV. Retorna a quantidade de linhas exportadas."""
+    return _export_csv(file_path, iter_transactions(account_number))
+
+def _update_account_balance(db, account_number, new_balance):
+    return db.update('accounts', {'balance': Money(new_balance)}, {'number': account_number})
+
 def update_account_balance(account_number, new_balance):
     """Atualiza o saldo de uma conta especifica."""
-    with DataBaseManager(DB_PATH) as db:
-        return db.update('accounts', {'balance': new_balance}, {'number': account_number})
+    return _write(_update_account_balance, account_number, new_balance)
+
+def _add_transaction(db, account_number, transaction_type, value):
+    date_now = datetime.now().strftime(TIMESTAMP_FORMAT)
+    db.execute_query(
+        "INSERT INTO transactions (account_number, transaction_type, value, date, balance_after) "
+        "VALUES (?, ?, ?, ?, (SELECT balance FROM accounts WHERE number = ?))",
+        (account_number, transaction_type, Money(value), date_now, account_number)
+    )
 
 def add_transaction(account_number, transaction_type, value):
-    """Adiciona um registro de transação no banco de dados"""
+    """Adiciona um registro de transação no banco de dados (o saldo corrente é o saldo atual da conta)"""
+    _write(_add_transaction, account_number, transaction_type, value)
+
+def _today():
+    """Dia atual no formato da tabela daily_withdrawals."""
+    return datetime.now().strftime("%Y-%m-%d")
+
+_COUNT_WITHDRAWAL_SQL = (
+    "INSERT INTO daily_withdrawals (account_number, day, count) VALUES (?, ?, ?) "
+    "ON CONFLICT (account_number, day) DO UPDATE SET count = count + excluded.count"
+)
+
+def _post(db, account_number, transaction_type, value):
+    """Aplica um depósito/saque usando a conexão do 'db' informado, sem fazer commit."""
+    value = Money(value)
+    if transaction_type == DEPOSIT:
+        query = "UPDATE accounts SET balance = balance + ? WHERE number = ?"
+        params = (value, account_number)
+    elif transaction_type == WITHDRAW:
+        # saldo, limite por operação e quantidade de saques do dia são conferidos no próprio UPDATE,
+        # assim dois operadores na mesma conta não conseguem sacar o mesmo dinheiro
+        today = _today()
+        query = (
+            "UPDATE accounts SET balance = balance - ? WHERE number = ? AND balance >= ? AND limit_value >= ? "
+            "AND withdraw_limit > COALESCE((SELECT count FROM daily_withdrawals WHERE account_number = ? AND day = ?), 0)"
+        )
+        params = (value, account_number, value, value, account_number, today)
+    else:
+        raise ValueError(f"Tipo de transação desconhecido: {transaction_type}")
+
+    if db.execute_query(query, params).rowcount == 0:
+        return None # conta inexistente, saldo insuficiente, limite excedido ou saques do dia esgotados
+    if transaction_type == WITHDRAW:
+        db.execute_query(_COUNT_WITHDRAWAL_SQL, (account_number, today, 1))
+
+    new_balance = db.select('accounts', columns='balance', condition={'number': account_number}, fetch_one=True)['balance']
+    db.insert('transactions', {
+        'account_number': account_number,
+        'transaction_type': transaction_type,
+        'value': value,
+        'date': datetime.now().strftime(TIMESTAMP_FORMAT),
+        'balance_after': new_balance
+    })
+    return new_balance
+
+def post_transaction(account_number, transaction_type, value):
+    """
+    Registra um depósito ou saque numa única transação do banco: confere saldo e limite,
+    atualiza o saldo e grava no extrato.
+    A operação passa pela fila de escrita do arquivo (engine/writer_queue.py), que junta os
+    lançamentos de várias threads num só commit em vez de disputarem o lock do sqlite.
+    Retorna o novo saldo da conta (Money), ou None se a operação foi recusada.
+    """
+    value = Money(value)
+    if value <= 0:
+        return None
+    return _write(_post, account_number, transaction_type, value)
+
+def _load_checking_accounts(db, account_numbers, day):
+    """Hidrata as contas informadas como CheckingAccount (com os saques do dia), numa consulta por bloco de numeros."""
+    accounts = {}
+    numbers = list(account_numbers)
+    for start in range(0, len(numbers), 500): # o sqlite limita a quantidade de '?' por consulta
+        chunk = numbers[start:start + 500]
+        query = (
+            "SELECT a.number, a.balance, a.limit_value, a.withdraw_limit, COALESCE(w.count, 0) AS withdrawals "
+            "FROM accounts a LEFT JOIN daily_withdrawals w ON w.account_number = a.number AND w.day = ? "
+            f"WHERE a.number IN ({', '.join(['?'] * len(chunk))})"
+        )
+        for row in db.execute_query(query, [day, *chunk]):
+            account = CheckingAccount(number=row['number'], client=None, limit=row['limit_value'], withdrawn_limit=row['withdraw_limit'])
+            account._balance = row['balance']
+            account._withdrawals_today = row['withdrawals']
+            accounts[row['number']] = account
+    return accounts
+
+def _post_group(db, group):
+    """
+    Aplica um grupo do post_batch dentro da transação da fila de escrita.
+    Retorna (quantidade_aceita, lançamentos_recusados).
+    """
+    transaction_classes = {DEPOSIT: Deposit, WITHDRAW: Withdraw}
+    rejected = []
+    today = _today()
+    accounts = _load_checking_accounts(db, {entry[0] for entry in group}, today)
+    date_now = datetime.now().strftime(TIMESTAMP_FORMAT)
+    ledger_rows = []
+    deltas = {}
+    withdrawals = {}
+
+    for entry in group:
+        account_number, transaction_type, value = entry
+        account = accounts.get(account_number)
+        transaction_class = transaction_classes.get(transaction_type)
+        if account is None or transaction_class is None:
+            rejected.append(entry)
+            continue
+        try:
+            transaction = transaction_class(value)
+        except (ValueError, TypeError):
+            rejected.append(entry) # valor que não é dinheiro: recusa só este lançamento, e não o lote
+            continue
+        if not transaction.register(account):
+            rejected.append(entry)
+            continue
+        ledger_rows.append((account_number, transaction_type, transaction.value, date_now, account.balance))
+        deltas[account_number] = deltas.get(account_number, 0) + signed_value(transaction_type, transaction.value)
+        if transaction_type == WITHDRAW:
+            withdrawals[account_number] = withdrawals.get(account_number, 0) + 1
+
+    db.insert_many('transactions', ('account_number', 'transaction_type', 'value', 'date', 'balance_after'), ledger_rows)
+    db.conn.executemany("UPDATE accounts SET balance = balance + ? WHERE number = ?",
+                        [(delta, number) for number, delta in deltas.items()])
+    db.conn.executemany(_COUNT_WITHDRAWAL_SQL, [(number, today, count) for number, count in withdrawals.items()])
+    return len(ledger_rows), rejected
+
+def post_batch(entries, group_size=1000, profile=None):
+    """
+    Lança muitos depósitos/saques de uma vez (ex.: liquidação do arquivo de fim de dia).
+    Cada grupo de 'group_size' lançamentos é validado pelas regras da CheckingAccount,
+    gravado com executemany e confirmado num único commit, pela fila de escrita do arquivo
+    (a mesma dos lançamentos avulsos: os saldos não mudam entre a leitura e o commit do grupo).
+    :param entries: Iteravel de tuplas (numero_conta, tipo, valor).
+    :param group_size: Quantidade de lançamentos por commit.
+    :param profile: Perfil de durabilidade (ex.: 'bulk' para importações grandes). O arquivo tem uma fila de
+                    escrita só, com um perfil: se ela já roda com outro, gera ValueError (veja get_writer).
+    Retorna (quantidade_aceita, lista_de_lançamentos_recusados).
+    """
+    accepted = 0
+    rejected = []
+    entries = iter(entries)
+    while True:
+        group = list(islice(entries, group_size))
+        if not group:
+            break
+        group_accepted, group_rejected = _write(_post_group, group, profile=profile)
+        accepted += group_accepted
+        rejected.extend(group_rejected)
+    return accepted, rejected
+
+def _needs_archive(db, account_number=None, start=None):
+    """
+    Se as transações da conta (ou de todas, com account_number None) a partir de 'start' (texto da data;
+    None = desde o começo) passam pelo arquivo morto, ou seja, se o periodo começa antes do archived_until.
+    """
+    if account_number is None:
+        return db.execute_query("SELECT 1 FROM accounts WHERE archived_until IS NOT NULL LIMIT 1").fetchone() is not None
+    account = db.select('accounts', columns='archived_until', condition={'number': account_number}, fetch_one=True)
+    archived_until = account['archived_until'] if account else None
+    return archived_until is not None and (start is None or start < archived_until)
+
+# as transações do arquivo morto e do banco principal juntas, para as leituras que passam pelo arquivo
+_ALL_TRANSACTIONS = "(SELECT * FROM archive.transactions UNION ALL SELECT * FROM main.transactions)"
+
+@contextmanager
+def _transactions_table(db, account_number=None, start=None):
+    """
+    Tabela de onde ler as transações: 'main.transactions' ou, se o periodo passa pelo arquivo
+    morto (veja _needs_archive), a união com ele, anexado enquanto o bloco 'with' durar.
+    """
+    if not _needs_archive(db, account_number, start):
+        yield 'main.transactions'
+        return
+    with _attached_archive(db):
+        yield _ALL_TRANSACTIONS
+
+def _select_transactions(db, account_number, start_date=None, end_date=None):
+    start = start_date.strftime(TIMESTAMP_FORMAT) if start_date else None
+    query = "SELECT * FROM {table} WHERE account_number = ?"
+    params = [account_number]
+    if start_date:
+        query += " AND date >= ?"
+        params.append(start)
+    if end_date:
+        query += " AND date <= ?"
+        params.append(end_date.strftime(TIMESTAMP_FORMAT))
+    with _transactions_table(db, account_number, start) as table:
+        return db.execute_query(query.format(table=table) + " ORDER BY id ASC", params).fetchall()
+
+def get_transactions_by_account(account_number, start_date=None, end_date=None):
+    """
+    Busca as transações da conta especifica, ordenado por data.
+    :param start_date: datetime inicial (inclusivo), opcional.
+    :param end_date: datetime final (inclusivo), opcional.
+    O arquivo morto (veja archive_transactions) só é lido quando o periodo pedido
+    começa antes da data até onde a conta foi arquivada.
+    """
     with DataBaseManager(DB_PATH) as db:
-        date_now = datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-        db.insert('transactions', {
-            'account_number': account_number,
-            'transaction_type': transaction_type,
-            'value': value,
-            'date': date_now
-        })
+        return _select_transactions(db, account_number, start_date, end_date)
 
-def get_transactions_by_account(account_number):
-    """Busca todas as transações da conta especifica, ordenado por data"""
+def count_transactions(account_number):
+    """Quantidade de transações da conta, contando as do arquivo morto (conta pelo indice, sem ler as linhas)."""
     with DataBaseManager(DB_PATH) as db:
-        return db.select('transactions', condition={'account_number': account_number}, order_by='id ASC')
+        with _transactions_table(db, account_number) as table:
+            return db.execute_query(f"SELECT COUNT(*) FROM {table} WHERE account_number = ?", (account_number,)).fetchone()[0]
 
-def delete_client(cpf):
-    """Exclui um cliente e todas as suas contas e transações associadas."""
+def get_statement_page(account_number, after_id=0, limit=100, start_date=None, end_date=None):
+    """
+    Busca uma pagina do extrato usando paginação por chave (keyset): só as transações depois de 'after_id'.
+    :param after_id: Id da ultima transação da pagina anterior (0 para a primeira pagina).
+    :param limit: Quantidade maxima de transações na pagina.
+    :param start_date: datetime inicial (inclusivo), opcional.
+    :param end_date: datetime final (inclusivo), opcional.
+    Para a proxima pagina, passe o id da ultima linha retornada como 'after_id'.
+    Sem datas, a pagina vem em ordem de id pelo indice (account_number, id). Com datas, vem em ordem de
+    (data, id) pelo indice (account_number, date): a chave da pagina passa a ser a data e o id da ultima linha,
+    e o intervalo é lido direto do indice em vez de testar a data linha por linha.
+    Como no get_transactions_by_account, o arquivo morto entra quando o periodo começa antes do archived_until.
+    """
     with DataBaseManager(DB_PATH) as db:
-        # encontra todas as contas que pertence ao cliente
-        accounts = db.select('accounts',columns='number', condition={'client_cpf': cpf})
+        lower = start_date.strftime(TIMESTAMP_FORMAT) if start_date else ""
+        with _transactions_table(db, account_number, lower or None) as table:
+            if not start_date and not end_date:
+                return db.execute_query(
+                    f"SELECT * FROM {table} WHERE account_number = ? AND id > ? ORDER BY id ASC LIMIT ?",
+                    (account_number, after_id, limit)
+                ).fetchall()
 
-        # deleta uma transação a cada conta encontrada
-        for account in accounts:
-            db.delete('transactions', {'account_number': account['number']})
+            query = f"SELECT * FROM {table} WHERE account_number = ? AND date >= ?"
+            params = [account_number, lower]
+            if end_date:
+                query += " AND date <= ?"
+                params.append(end_date.strftime(TIMESTAMP_FORMAT))
+            if after_id:
+                after = db.execute_query(f"SELECT date FROM {table} WHERE id = ?", (after_id,)).fetchone()
+                if after is not None:
+                    params[1] = max(lower, after['date'])
+                    query += " AND (date, id) > (?, ?)"
+                    params += [after['date'], after_id]
+                else:
+                    query += " AND id > ?"
+                    params.append(after_id)
+            query += " ORDER BY date ASC, id ASC LIMIT ?"
+            params.append(limit)
+            return db.execute_query(query, params).fetchall()
 
-        # deleta todas as contas encontradas
-        db.delete('accounts', {'client_cpf': cpf})
-        # deleta o cliente
-        db.delete('clients', {'cpf': cpf})
+def signed_value(transaction_type, value):
+    """Efeito da transação no saldo: positivo para depósito, negativo para saque."""
+    return value if transaction_type == DEPOSIT else -value
 
-def delete_account(account_number):
-    """Exclui uma conta especifica e todas as suas transações associadas."""
+def archive_db_path(db_path=None):
+    """Arquivo do arquivo morto de um banco: banking.db -> banking_archive.db."""
+    root, ext = os.path.splitext(db_path or DB_PATH)
+    return f"{root}_archive{ext or '.db'}"
+
+# o arquivo morto guarda as linhas como estavam, sem chave estrangeira (não existe FK entre arquivos)
+ARCHIVE_TRANSACTION_COLUMNS = {name: definition for name, definition in TRANSACTION_COLUMNS.items() if not name.startswith('FOREIGN KEY')}
+
+@contextmanager
+def _attached_archive(db):
+    """Anexa (ATTACH) o arquivo morto como 'archive' na conexão do 'db' e desanexa no fim."""
+    if db.conn.in_transaction:
+        db.conn.commit() # ATTACH/DETACH não podem rodar dentro de uma transação
+    db.execute_query("ATTACH DATABASE ? AS archive", (archive_db_path(db.db_path),))
+    try:
+        db.create_table('archive.transactions', ARCHIVE_TRANSACTION_COLUMNS)
+        db.create_index('archive.idx_archive_account_date', 'transactions', ['account_number', 'date'])
+        yield db
+    finally:
+        if db.conn.in_transaction:
+            db.conn.commit()
+        db.execute_query("DETACH DATABASE archive")
+
+def archive_transactions(before, batch_size=5000, profile=None):
+    """
+    Move para o arquivo morto (archive_db_path()) as transações com data anterior a 'before' (datetime),
+    em lotes de 'batch_size'. O saldo das contas não muda; cada conta guarda o saldo corrente
+    da ultima transação arquivada (archived_balance) e até onde foi arquivada (archived_until).
+    Cada lote é uma operação exclusiva da fila de escrita (o ATTACH não roda dentro de transação),
+    então os lançamentos esperam só o lote atual, e não o arquivamento inteiro.
+    Retorna a quantidade de transações movidas.
+    """
+    from engine.writer_queue import get_writer
+    writer = get_writer(DB_PATH, profile)
+    cutoff = before.strftime(TIMESTAMP_FORMAT)
+    moved = 0
+    while True:
+        batch_moved = writer.submit_exclusive(_archive_batch, cutoff, batch_size).result()
+        if batch_moved is None:
+            return moved
+        moved += batch_moved
+
+def _archive_batch(db, cutoff, batch_size):
+    """Arquiva um lote; retorna quantas transações saíram do banco principal, ou None se não sobrou nada."""
+    with _attached_archive(db):
+        upper = db.execute_query(
+            "SELECT MAX(id) FROM (SELECT id FROM main.transactions WHERE date < ? ORDER BY id LIMIT ?)",
+            (cutoff, batch_size)
+        ).fetchone()[0]
+        if upper is None:
+            return None
+        batch = "FROM main.transactions WHERE date < ? AND id <= ?"
+
+        # 1) copia o lote para o arquivo morto, com commit proprio: com WAL o commit não é atomico
+        #    entre os dois arquivos, então só apaga do banco principal o que já está gravado no outro
+        #    (se cair no meio, rodar de novo não duplica nada: o id é a chave do arquivo morto)
+        db.execute_query(f"INSERT OR IGNORE INTO archive.transactions SELECT * {batch}", (cutoff, upper))
+        db.conn.commit()
+
+        # 2) saldo carregado nas contas e remoção do lote, num commit só
+        db.execute_query(
+            "UPDATE accounts SET archived_until = ?, archived_balance = ("
+            "  SELECT balance_after FROM main.transactions WHERE id = ("
+            "    SELECT MAX(id) FROM main.transactions WHERE account_number = accounts.number AND date < ? AND id <= ?)) "
+            f"WHERE number IN (SELECT account_number {batch})",
+            (cutoff, cutoff, upper, cutoff, upper)
+        )
+        moved = db.execute_query(f"DELETE {batch}", (cutoff, upper)).rowcount
+        db.conn.commit()
+        return moved
+
+def _last_balance(db, table_name, account_number, moment):
+    """Saldo corrente da ultima transação da conta até o momento em 'table_name', ou None."""
+    row = db.execute_query(
+        f"SELECT balance_after FROM {table_name} WHERE account_number = ? AND date <= ? "
+        "ORDER BY date DESC, id DESC LIMIT 1",
+        (account_number, moment)
+    ).fetchone()
+    return row['balance_after'] if row else None
+
+def _opening_balance(db, table_name, account_number):
+    """Saldo de antes da primeira transação da conta em 'table_name', ou None se não houver transações."""
+    row = db.execute_query(
+        f"SELECT transaction_type, value, balance_after FROM {table_name} WHERE account_number = ? "
+        "ORDER BY date ASC, id ASC LIMIT 1",
+        (account_number,)
+    ).fetchone()
+    return row['balance_after'] - signed_value(row['transaction_type'], row['value']) if row else None
+
+def get_balance_at(account_number, timestamp):
+    """
+    Retorna o saldo da conta no momento informado (datetime), ou None se a conta não existir.
+    É o saldo corrente da ultima transação até o momento, achado com uma busca no indice (account_number, date).
+    O arquivo morto só é consultado para momentos anteriores à data até onde a conta foi arquivada.
+    """
+    moment = timestamp.strftime(TIMESTAMP_FORMAT)
     with DataBaseManager(DB_PATH) as db:
-        # deleta todas as transações antes de deletar as contas
-        db.delete('transactions', {'account_number': account_number})
+        account = db.select('accounts', columns='balance, archived_balance, archived_until',
+                            condition={'number': account_number}, fetch_one=True)
+        if account is None:
+            return None
+
+        archived_until = account['archived_until']
+        if archived_until is not None and moment < archived_until:
+            with _attached_archive(db):
+                balance = _last_balance(db, 'archive.transactions', account_number, moment)
+                if balance is None:
+                    balance = _opening_balance(db, 'archive.transactions', account_number)
+            return balance
+
+        balance = _last_balance(db, 'main.transactions', account_number, moment)
+        if balance is not None:
+            return balance
+        if archived_until is not None:
+            return account['archived_balance'] # entre o fim do arquivo morto e a proxima transação
+        balance = _opening_balance(db, 'main.transactions', account_number)
+        # conta sem transações: o saldo nunca mudou
+        return account['balance'] if balance is None else balance
+
+def _delete_client(db, cpf):
+    db.delete('clients', {'cpf': cpf})
+
+def delete_client(cpf):
+    """
+    Exclui um cliente e todas as suas contas e transações associadas.
+    Um DELETE só: as contas, transações e contadores de saque saem
+    pelo ON DELETE CASCADE das chaves estrangeiras, dentro do proprio sqlite.
+    """
+    _write(_delete_client, cpf)
+
+def _delete_account(db, account_number):
+    db.delete('accounts', {'number': account_number})
+
+def delete_account(account_number):
+    """Exclui uma conta especifica e todas as suas transações associadas (por cascata)."""
+    _write(_delete_account, account_number)
+
+# Shards: cada shard é um arquivo do banco com o mesmo esquema, com writer (fila de escrita) e lock proprios.
+# As contas novas de uma agencia são abertas no shard da agencia, e cada shard numera as contas dentro
+# da sua faixa (shard 0: 1..ACCOUNT_RANGE, shard 1: ACCOUNT_RANGE+1..2*ACCOUNT_RANGE, ...), então
+# o numero da conta basta para achar o arquivo. O cliente é gravado em todo shard onde ele tem conta.
+ACCOUNT_RANGE = 10_000_000
+
+# proximo numero de conta do shard; não dá pra usar o AUTOINCREMENT, que pula para depois
+# dos numeros das contas recebidas de outro shard num rebalanceamento
+SHARD_SEQUENCE_COLUMNS = {
+    'name': 'TEXT PRIMARY KEY',
+    'next_number': 'INTEGER NOT NULL',
+}
+
+def _column_list(columns):
+    return ', '.join(name for name in columns if ' ' not in name)
+
+class ShardRouter():
+    """
+    Roteia as operações para o arquivo (shard) da agencia ou da faixa de numeros da conta.
+    As escritas de cada shard passam pela fila de escrita daquele arquivo (get_writer), então
+    shards diferentes gravam em paralelo, cada um com o seu lock do sqlite.
+    """
+
+    def __init__(self, shards, agencies, ranges=None, account_range=ACCOUNT_RANGE, profile=None):
+        """
+        :param shards: Dicionário {nome_do_shard: caminho_do_arquivo}, na ordem das faixas de numeros.
+        :param agencies: Dicionário {agencia: nome_do_shard} onde as contas novas de cada agencia são abertas.
+        :param ranges: Lista de (primeiro_numero, ultimo_numero, nome_do_shard). Padrão: uma faixa de
+                       'account_range' numeros por shard, na ordem de 'shards'.
+        :param profile: Perfil de durabilidade das conexões.
+        """
+        self.shards = dict(shards)
+        self.agencies = dict(agencies)
+        self.account_range = account_range
+        self.profile = profile
+        if ranges is None:
+            ranges = [(index * account_range + 1, (index + 1) * account_range, name) for index, name in enumerate(self.shards)]
+        self._set_ranges(ranges)
+        self._rebalance_lock = threading.Lock()
+        self._clients_lock = threading.Lock()
+        # uma thread por shard para as leituras em paralelo (veja _fan_out), encerradas no close()
+        self._executor = ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="shard-read")
+
+    def _set_ranges(self, ranges):
+        self.ranges = sorted((int(first), int(last), name) for first, last, name in ranges)
+        self._range_starts = [first for first, _, _ in self.ranges]
+
+    @classmethod
+    def load(cls, config_path):
+        """Lê o mapa dos shards de um arquivo JSON (o mesmo gravado por save)."""
+        with open(config_path, encoding="utf-8") as f:
+            config = json.load(f)
+        return cls(config['shards'], config['agencies'], ranges=config.get('ranges'),
+                   account_range=config.get('account_range', ACCOUNT_RANGE), profile=config.get('profile'))
+
+    def save(self, config_path):
+        """Grava o mapa dos shards num arquivo JSON (lido de volta por load)."""
+        config = {'shards': self.shards, 'agencies': self.agencies, 'account_range': self.account_range,
+                  'profile': self.profile, 'ranges': [list(entry) for entry in self.ranges]}
+        # grava num arquivo ao lado e troca de uma vez: uma queda no meio não deixa o mapa pela metade
+        temp_path = f"{config_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        os.replace(temp_path, config_path)
+
+    def create_tables(self):
+        """Cria (ou migra) as tabelas de todos os shards e inicia a numeração de contas de cada um na sua faixa."""
+        for index, path in enumerate(self.shards.values()):
+            create_project_tables(self.profile, db_path=path)
+            with DataBaseManager(path, profile=self.profile) as db:
+                db.create_table('shard_sequence', SHARD_SEQUENCE_COLUMNS)
+                db.execute_query("INSERT OR IGNORE INTO shard_sequence (name, next_number) VALUES ('accounts', ?)",
+                                 (index * self.account_range + 1,))
+
+    def shard_for_agency(self, agency):
+        """Caminho do shard onde as contas novas da agencia são abertas."""
+        if agency not in self.agencies:
+            raise ValueError(f"Agencia sem shard configurado: {agency}")
+        return self.shards[self.agencies[agency]]
+
+    def shard_for_account(self, account_number):
+        """Caminho do shard dono do numero da conta."""
+        index = bisect.bisect_right(self._range_starts, account_number) - 1
+        if index < 0 or account_number > self.ranges[index][1]:
+            raise ValueError(f"Conta fora das faixas dos shards: {account_number}")
+        return self.shards[self.ranges[index][2]]
+
+    def _writer(self, path):
+        from engine.writer_queue import get_writer
+        return get_writer(path, self.profile)
+
+    def _fan_out(self, func):
+        """Roda func(caminho) em todos os shards ao mesmo tempo; retorna os resultados na ordem dos shards."""
+        return list(self._executor.map(func, self.shards.values()))
+
+    def close(self):
+        """Encerra as threads de leitura do roteador (as filas de escrita fecham no close_all_pools)."""
+        self._executor.shutdown(wait=True)
+
+    def _select(self, path, *args, **kwargs):
+        with DataBaseManager(path, profile=self.profile) as db:
+            return db.select(*args, **kwargs)
+
+    def add_client(self, cpf, name, birth_date, address, agency):
+        """
+        Cadastra o cliente no shard da agencia. Retorna False se o CPF já existe em algum shard.
+        A busca nos shards e o cadastro rodam sob um lock do roteador, para duas threads não cadastrarem o mesmo
+        CPF em shards diferentes; entre processos não há essa garantia (cada shard só recusa o CPF repetido nele).
+        """
+        with self._clients_lock:
+            if self.get_client_by_cpf(cpf) is not None:
+                return False
+            return self._writer(self.shard_for_agency(agency)).submit(_add_client, cpf, name, birth_date, address).result()
+
+    def get_client_by_cpf(self, cpf):
+        """Busca o cliente em todos os shards (o primeiro encontrado)."""
+        for row in self._fan_out(lambda path: self._select(path, 'clients', condition={'cpf': cpf}, fetch_one=True)):
+            if row is not None:
+                return row
+        return None
+
+    def get_all_clients(self):
+        """Todos os clientes de todos os shards, sem repetir quem tem conta em mais de um, ordenados por CPF."""
+        clients = {}
+        for rows in self._fan_out(lambda path: self._select(path, 'clients')):
+            for row in rows:
+                clients.setdefault(row['cpf'], row)
+        return [clients[cpf] for cpf in sorted(clients)]
+
+    def get_accounts_by_client(self, cpf):
+        """Contas do cliente em todos os shards, ordenadas pelo numero."""
+        rows = [row for rows in self._fan_out(lambda path: self._select(path, 'accounts', condition={'client_cpf': cpf})) for row in rows]
+        return sorted(rows, key=lambda row: row['number'])
+
+    def add_account(self, agency, balance, client_cpf):
+        """Abre a conta no shard da agencia, copiando o cadastro do cliente para lá se preciso. None se o cliente não existe."""
+        client = self.get_client_by_cpf(client_cpf)
+        if client is None:
+            return None
+        path = self.shard_for_agency(agency)
+        return self._writer(path).submit(self._open_account, path, agency, Money(balance), client).result()
+
+    def _open_account(self, db, path, agency, balance, client):
+        number = db.execute_query(
+            "UPDATE shard_sequence SET next_number = next_number + 1 WHERE name = 'accounts' RETURNING next_number - 1"
+        ).fetchone()[0]
+        if self.shard_for_account(number) != path:
+            raise ValueError(f"A faixa de numeros de conta do shard acabou ({path}).")
+        db.execute_query("INSERT OR IGNORE INTO clients (cpf, name, birth_date, address) VALUES (?, ?, ?, ?)",
+                         (client['cpf'], client['name'], client['birth_date'], client['address']))
+        db.insert('accounts', {'number': number, 'agency': agency, 'balance': balance, 'client_cpf': client['cpf']})
+        return number
+
+    def post_transaction(self, account_number, transaction_type, value):
+        """Igual ao post_transaction do módulo, pela fila de escrita do shard da conta."""
+        value = Money(value)
+        if value <= 0:
+            return None
+        return self._writer(self.shard_for_account(account_number)).post(account_number, transaction_type, value).result()
+
+    def get_transactions_by_account(self, account_number, start_date=None, end_date=None):
+        """Igual ao get_transactions_by_account do módulo, no shard da conta (com o arquivo morto do shard)."""
+        with DataBaseManager(self.shard_for_account(account_number), profile=self.profile) as db:
+            return _select_transactions(db, account_number, start_date, end_date)
+
+    def rebalance(self, first, last, target, config_path=None):
+        """
+        Move as contas já abertas de numero 'first' a 'last' (com transações, contadores e clientes) para o shard
+        'target', como operação exclusiva na fila de escrita da origem. Pode ser repetido depois de uma queda.
+        Retorna a quantidade de contas movidas.
+        """
+        with self._rebalance_lock: # um por vez: a origem espera a fila do destino
+            target_path = self.shards[target]
+            source = self.shard_for_account(first)
+            if self.shard_for_account(last) != source:
+                raise ValueError("A faixa informada pertence a mais de um shard.")
+            if source == target_path:
+                # o mapa já foi gravado numa execução que caiu antes de apagar a origem: só falta limpar
+                for path in self.shards.values():
+                    if path != target_path:
+                        self._writer(path).submit(_delete_account_range, first, last).result()
+                return 0
+            return self._writer(source).submit_exclusive(self._move_range, source, first, last, target, config_path).result()
+
+    def _move_range(self, db, source, first, last, target, config_path):
+        """Roda na fila de escrita da origem ('db' é a conexão dela, sem transação aberta)."""
+        db.execute_query("BEGIN IMMEDIATE") # trava a origem também para outros processos
+        next_number = db.execute_query("SELECT next_number FROM shard_sequence WHERE name = 'accounts'").fetchone()
+        if next_number is None or last >= next_number[0]:
+            raise ValueError("Só contas já abertas podem ser movidas (a faixa passa do ultimo numero usado no shard).")
+
+        moved = self._writer(self.shards[target]).submit_exclusive(_copy_account_range, source, first, last).result()
+
+        # a faixa passa para o destino (e o mapa é gravado) antes de apagar na origem
+        ranges = []
+        for range_first, range_last, name in self.ranges:
+            if self.shards[name] == source and range_first <= first and last <= range_last:
+                if range_first < first:
+                    ranges.append((range_first, first - 1, name))
+                ranges.append((first, last, target))
+                if last < range_last:
+                    ranges.append((last + 1, range_last, name))
+            else:
+                ranges.append((range_first, range_last, name))
+        old_ranges = self.ranges
+        self._set_ranges(ranges)
+        if config_path:
+            try:
+                self.save(config_path)
+            except Exception:
+                self._set_ranges(old_ranges) # o mapa continua o do arquivo; rodar de novo termina a movimentação
+                raise
+
+        _delete_account_range(db, first, last)
+        db.conn.commit()
+        return moved
+
+def _delete_account_range(db, first, last):
+    # o ON DELETE CASCADE leva junto as linhas filhas das contas
+    return db.execute_query("DELETE FROM accounts WHERE number BETWEEN ? AND ?", (first, last)).rowcount
+
+def _copy_account_range(db, source, first, last):
+    """
+    Copia para o shard do 'db' as contas da faixa que estão no shard 'source' e ainda não estão aqui,
+    com as linhas filhas, num commit só (então uma conta ou vem inteira ou não vem).
+    As transações ganham ids novos, seguidos, depois do maior id deste shard, na mesma ordem.
+    Retorna a quantidade de contas da faixa na origem.
+    """
+    db.execute_query("ATTACH DATABASE ? AS source", (source,))
+    try:
+        db.execute_query("CREATE TEMP TABLE moved_accounts (number INTEGER PRIMARY KEY)")
+        db.execute_query("CREATE TEMP TABLE moved_ids (position INTEGER PRIMARY KEY, old_id INTEGER UNIQUE)")
+        try:
+            # BEGIN simples: o IMMEDIATE travaria também o 'source' anexado, que a origem já travou
+            db.execute_query("BEGIN")
+            total = db.execute_query("SELECT COUNT(*) FROM source.accounts WHERE number BETWEEN ? AND ?",
+                                     (first, last)).fetchone()[0]
+            db.execute_query("INSERT INTO temp.moved_accounts SELECT number FROM source.accounts WHERE number BETWEEN ? AND ? "
+                             "AND number NOT IN (SELECT number FROM main.accounts WHERE number BETWEEN ? AND ?)",
+                             (first, last, first, last))
+            client_columns = _column_list(CLIENT_COLUMNS)
+            db.execute_query(
+                f"INSERT OR IGNORE INTO main.clients ({client_columns}) SELECT {client_columns} FROM source.clients "
+                "WHERE cpf IN (SELECT client_cpf FROM source.accounts WHERE number IN (SELECT number FROM temp.moved_accounts))")
+            account_columns = _column_list(ACCOUNT_COLUMNS)
+            db.execute_query(f"INSERT INTO main.accounts ({account_columns}) SELECT {account_columns} FROM source.accounts "
+                             "WHERE number IN (SELECT number FROM temp.moved_accounts)")
+
+            base = db.execute_query(
+                "SELECT MAX(COALESCE((SELECT seq FROM main.sqlite_sequence WHERE name = 'transactions'), 0), "
+                "COALESCE((SELECT MAX(id) FROM main.transactions), 0))").fetchone()[0]
+            db.execute_query("INSERT INTO temp.moved_ids (old_id) SELECT id FROM source.transactions "
+                             "WHERE account_number IN (SELECT number FROM temp.moved_accounts) ORDER BY id")
+            columns = [name for name in TRANSACTION_COLUMNS if ' ' not in name and name != 'id']
+            db.execute_query(
+                f"INSERT INTO main.transactions (id, {', '.join(columns)}) "
+                f"SELECT ? + m.position, {', '.join('t.' + name for name in columns)} "
+                "FROM source.transactions t JOIN temp.moved_ids m ON m.old_id = t.id ORDER BY m.position", (base,))
 
-        # deleta todas as contas
-        db.delete('accounts', {'number': account_number})
\ No newline at end of file
+            columns = _column_list(DAILY_WITHDRAWAL_COLUMNS)
+            db.execute_query(f"INSERT INTO main.daily_withdrawals ({columns}) SELECT {columns} FROM source.daily_withdrawals "
+                             "WHERE account_number IN (SELECT number FROM temp.moved_accounts)")
+            db.conn.commit()
+            return total
+        finally:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            db.execute_query("DROP TABLE temp.moved_accounts")
+            db.execute_query("DROP TABLE temp.moved_ids")
+    finally:
+        db.execute_query("DETACH DATABASE source")
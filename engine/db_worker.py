@@ -0,0 +1,44 @@
+import threading
+
+from PyQt6.QtCore import QObject, QRunnable, pyqtSignal
+
+class WorkerSignals(QObject):
+    """Sinais que o DbWorker emite de volta para a thread da interface."""
+    finished = pyqtSignal(object)  # resultado da função
+    error = pyqtSignal(object)     # exceção levantada
+
+class DbWorker(QRunnable):
+    """
+    Executa uma chamada ao banco (ou ao BankingService) numa thread do QThreadPool,
+    para a janela não travar enquanto o disco ou o lock do sqlite respondem.
+    Cancelar não interrompe a chamada que já começou: só descarta o resultado dela
+    (as chamadas são curtas, uma pagina do extrato por vez).
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Pede o cancelamento: se ainda não começou, não roda; se já começou, o resultado é descartado."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            result = self.func(*self.args, **self.kwargs)
+        except Exception as exc:
+            if not self.cancelled:
+                self.signals.error.emit(exc)
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(result)
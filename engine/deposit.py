@@ -1,9 +1,10 @@
 from engine.transaction import Transaction
+from engine.money import Money
 from abc import ABC, abstractmethod
 
 class Deposit(Transaction):
     def __init__(self, value):
-        self._value = value
+        self._value = Money(value)
     
     @property
     def value(self):
@@ -0,0 +1,167 @@
+import argparse
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from engine import events
+
+class EventLog():
+    """
+    Log estruturado de eventos em JSON lines (um objeto JSON por linha).
+    Ao lado do arquivo fica um indice sqlite (<arquivo>.idx) com a posição de cada
+    evento por CPF e por conta, assim a busca vai direto nas linhas certas sem ler o arquivo todo.
+    Os eventos são gravados em lotes: quando o lote enche ou, no maximo, 'flush_interval' segundos depois.
+    """
+
+    def __init__(self, file_path, index_path=None, batch_size=100, flush_interval=0.5):
+        """
+        :param file_path: Arquivo .jsonl dos eventos.
+        :param index_path: Arquivo do indice (padrão: file_path + '.idx').
+        :param batch_size: Eventos acumulados antes de gravar (flush) arquivo e indice juntos.
+        :param flush_interval: Segundos máximos que um evento espera antes de ir pro arquivo. 0 desliga (só pelo lote).
+        """
+        self.file_path = file_path
+        self.index_path = index_path or f"{file_path}.idx"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self._index = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._index.execute("PRAGMA journal_mode = WAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS event_index (key TEXT NOT NULL, offset INTEGER NOT NULL, PRIMARY KEY (key, offset)) WITHOUT ROWID"
+        )
+        self._index.commit()
+
+        self._thread = None
+        if flush_interval:
+            self._thread = threading.Thread(target=self._run, name="event-log-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Laço da thread: grava o que estiver pendente a cada 'flush_interval' segundos."""
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except (IOError, sqlite3.Error) as exc:
+                events.emit(events.ERROR, 'event_log.error', "Erro ao gravar o log de eventos: {error}", error=exc, file=self.file_path)
+
+    def record(self, event_type, cpf=None, account_number=None, value=None, latency_ms=None, **extra):
+        """Registra um evento. O valor em dinheiro é gravado em centavos (value_cents)."""
+        event = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': event_type}
+        if cpf is not None:
+            event['cpf'] = cpf
+        if account_number is not None:
+            event['account_number'] = account_number
+        if value is not None:
+            event['value_cents'] = getattr(value, 'cents', value)
+        if latency_ms is not None:
+            event['latency_ms'] = round(latency_ms, 3)
+        event.update(extra)
+
+        with self._lock:
+            self._pending.append(event)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """Grava os eventos pendentes no arquivo e as posições no indice."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        index_rows = []
+        with open(self.file_path, "ab") as f:
+            offset = f.tell()
+            chunks = []
+            for event in self._pending:
+                line = (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+                for key in _index_keys(event):
+                    index_rows.append((key, offset))
+                chunks.append(line)
+                offset += len(line)
+            f.write(b"".join(chunks))
+        self._index.executemany("INSERT OR IGNORE INTO event_index (key, offset) VALUES (?, ?)", index_rows)
+        self._index.commit()
+        self._pending = []
+
+    def find(self, cpf=None, account_number=None):
+        """Retorna os eventos de um CPF e/ou de uma conta, lendo só as linhas indicadas pelo indice."""
+        keys = []
+        if cpf is not None:
+            keys.append(f"cpf:{cpf}")
+        if account_number is not None:
+            keys.append(f"account:{account_number}")
+        if not keys:
+            raise ValueError("Informe um CPF ou um numero de conta para a busca.")
+
+        offsets = None
+        with self._lock: # a conexão do indice é dividida com a thread que grava
+            self._flush_locked()
+            for key in keys:
+                found = {row[0] for row in self._index.execute("SELECT offset FROM event_index WHERE key = ?", (key,))}
+                offsets = found if offsets is None else offsets & found # com CPF e conta, só os eventos que têm os dois
+
+        events = []
+        if not offsets:
+            return events
+        with open(self.file_path, "rb") as f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                events.append(json.loads(f.readline()))
+        return events
+
+    def rebuild_index(self):
+        """Refaz o indice lendo o arquivo inteiro (ex.: se o indice foi apagado ou ficou para trás numa queda)."""
+        with self._lock:
+            self._flush_locked()
+            self._index.execute("DELETE FROM event_index")
+            index_rows = []
+            with open(self.file_path, "rb") as f:
+                offset = 0
+                for line in f:
+                    for key in _index_keys(json.loads(line)):
+                        index_rows.append((key, offset))
+                    offset += len(line)
+            self._index.executemany("INSERT OR IGNORE INTO event_index (key, offset) VALUES (?, ?)", index_rows)
+            self._index.commit()
+
+    def close(self):
+        """Grava o que falta, encerra a thread e fecha o indice."""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        self._index.close()
+
+def _index_keys(event):
+    """Chaves do indice de um evento."""
+    keys = []
+    if 'cpf' in event:
+        keys.append(f"cpf:{event['cpf']}")
+    if 'account_number' in event:
+        keys.append(f"account:{event['account_number']}")
+    return keys
+
+def main(argv=None):
+    """Ferramenta de consulta: python -m engine.event_log eventos.jsonl --cpf 123 --account 4"""
+    parser = argparse.ArgumentParser(description="Busca eventos no log estruturado usando o indice.")
+    parser.add_argument("file", help="arquivo .jsonl de eventos")
+    parser.add_argument("--cpf")
+    parser.add_argument("--account", type=int)
+    args = parser.parse_args(argv)
+
+    event_log = EventLog(args.file)
+    try:
+        for event in event_log.find(cpf=args.cpf, account_number=args.account):
+            print(json.dumps(event, ensure_ascii=False))
+    finally:
+        event_log.close()
+
+if __name__ == "__main__":
+    main()
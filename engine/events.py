@@ -0,0 +1,78 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+# Mensagens do motor (banco, contas, clientes) no lugar dos print().
+# Sem nenhum assinante, emit() volta logo na primeira linha: nada é formatado nem escrito.
+# A janela, a linha de comando e os testes assinam com subscribe() a partir do nivel que interessa.
+
+DEBUG = 10   # uma mensagem por linha gravada (insert/update/delete)
+INFO = 20    # esquema, operações concluidas
+WARNING = 30 # operações recusadas
+ERROR = 40   # falhas inesperadas
+
+LEVEL_NAMES = {DEBUG: 'DEBUG', INFO: 'INFO', WARNING: 'WARNING', ERROR: 'ERROR'}
+
+_subscribers = [] # lista de (nivel_minimo, callback)
+_min_level = None # menor nivel entre os assinantes; None = ninguem ouvindo
+_lock = threading.Lock()
+
+def _refresh_min_level():
+    global _min_level
+    _min_level = min((level for level, _ in _subscribers), default=None)
+
+def subscribe(callback, level=INFO):
+    """
+    Passa a entregar a 'callback' os eventos de nivel 'level' para cima.
+    A callback recebe (nivel, nome_do_evento, mensagem, campos).
+    """
+    with _lock:
+        _subscribers.append((level, callback))
+        _refresh_min_level()
+    return callback
+
+def unsubscribe(callback):
+    with _lock:
+        _subscribers[:] = [(level, func) for level, func in _subscribers if func is not callback]
+        _refresh_min_level()
+
+@contextmanager
+def subscribed(callback, level=INFO):
+    """Assinatura só dentro do bloco 'with' (útil nos testes)."""
+    subscribe(callback, level)
+    try:
+        yield callback
+    finally:
+        unsubscribe(callback)
+
+def is_enabled(level):
+    """True se algum assinante recebe eventos deste nivel."""
+    return _min_level is not None and level >= _min_level
+
+def emit(level, name, message, **fields):
+    """
+    Emite um evento. 'message' é um modelo str.format preenchido com 'fields',
+    e só é formatado se alguém estiver ouvindo.
+    Ex: emit(DEBUG, 'db.row_inserted', "Registro inserido em '{table}'.", table='clients')
+    """
+    if _min_level is None or level < _min_level:
+        return
+    text = message.format(**fields) if fields else message
+    for subscriber_level, callback in list(_subscribers):
+        if level >= subscriber_level:
+            callback(level, name, text, fields)
+
+def print_subscriber(level, name, message, fields):
+    """Assinante que escreve a mensagem no terminal (linha de comando)."""
+    print(message)
+
+class EventCounter():
+    """Assinante de metricas: conta os eventos por nome."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._lock = threading.Lock()
+
+    def __call__(self, level, name, message, fields):
+        with self._lock:
+            self.counts[name] += 1
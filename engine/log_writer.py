@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+
+from engine import events
+
+class LogWriter():
+    """
+    Grava as linhas de log em segundo plano: quem chama só coloca a linha numa fila,
+    e uma thread junta as linhas em lotes e escreve no arquivo, trocando de arquivo pelo tamanho.
+    """
+
+    _STOP = object()
+
+    def __init__(self, file_path, max_bytes=5 * 1024 * 1024, backup_count=5, batch_size=200, flush_interval=0.5):
+        """
+        :param file_path: Arquivo de log.
+        :param max_bytes: Tamanho a partir do qual o arquivo é rotacionado (file.1, file.2...). 0 desliga a rotação.
+        :param backup_count: Quantos arquivos antigos manter.
+        :param batch_size: Quantidade de linhas que força uma escrita imediata.
+        :param flush_interval: Segundos máximos que uma linha espera na fila antes de ir pro arquivo.
+        """
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        """Enfileira uma linha (sem '\\n') para ser gravada."""
+        self._queue.put(line)
+
+    def flush(self, timeout=None):
+        """Espera até tudo que já foi enfileirado estar gravado no arquivo."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Grava o que falta e encerra a thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _run(self):
+        """Laço da thread: junta as linhas até o lote encher ou o tempo acabar."""
+        batch = []
+        waiting = [] # pedidos de flush atendidos depois da proxima escrita
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._write_batch(batch)
+                self._close_file()
+                for event in waiting:
+                    event.set()
+                return
+            if isinstance(item, threading.Event):
+                waiting.append(item)
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if waiting or len(batch) >= self.batch_size or (deadline is not None and time.monotonic() >= deadline):
+                self._write_batch(batch)
+                batch = []
+                deadline = None
+                for event in waiting:
+                    event.set()
+                waiting = []
+
+    def _write_batch(self, lines):
+        """Escreve o lote de uma vez e rotaciona o arquivo se passou do tamanho."""
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                self._file = open(self.file_path, "a", encoding="utf-8")
+            self._file.write("".join(line + "\n" for line in lines))
+            self._file.flush()
+            if self.max_bytes and self._file.tell() >= self.max_bytes:
+                self._rotate()
+        except IOError as exc:
+            events.emit(events.ERROR, 'log_writer.error', "Erro ao escrever no log: {error}", error=exc, file=self.file_path)
+
+    def _rotate(self):
+        """log.txt -> log.txt.1 -> log.txt.2 ... apagando o mais antigo."""
+        self._close_file()
+        for index in range(self.backup_count - 1, 0, -1):
+            older = f"{self.file_path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.file_path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.file_path, f"{self.file_path}.1")
+        else:
+            os.remove(self.file_path)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,307 @@
+from datetime import datetime
+
+from engine import database, events
+
+# Migrações versionadas do esquema. A versão aplicada fica em PRAGMA user_version.
+# Cada migração é idempotente: num banco novo (já criado com o esquema atual) ela não faz nada
+# e só avança a versão. As migrações pesadas trabalham em lotes com commit entre eles,
+# gravam o ponto onde pararam em 'schema_migration_progress' e continuam dali se forem interrompidas.
+MIGRATIONS = []
+
+PROGRESS_COLUMNS = {
+    'version': 'INTEGER PRIMARY KEY',
+    'last_key': 'INTEGER NOT NULL', # ultima chave (id, numero da conta...) já migrada
+}
+
+def migration(version, description):
+    """Decorador que registra uma função como a migração de numero 'version'."""
+    def register(func):
+        MIGRATIONS.append((version, description, func))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return func
+    return register
+
+def emit_progress(version, description, done, total):
+    """Relatorio padrão de progresso das migrações: um evento por lote (veja engine/events.py)."""
+    events.emit(events.INFO, 'db.migration_progress', "Migração {version} ({description}): {done}/{total}",
+                version=version, description=description, done=done, total=total)
+
+class MigrationContext():
+    """O que uma migração recebe: o banco, o tamanho do lote e o controle de progresso."""
+
+    def __init__(self, db, version, description, batch_size, progress):
+        self.db = db
+        self.version = version
+        self.description = description
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def checkpoint(self):
+        """Ultima chave já migrada numa execução anterior (0 se for a primeira vez)."""
+        row = self.db.select('schema_migration_progress', columns='last_key', condition={'version': self.version}, fetch_one=True)
+        return row['last_key'] if row else 0
+
+    def save_checkpoint(self, last_key, done, total):
+        """Grava até onde a migração chegou e faz commit do lote."""
+        self.db.execute_query(
+            "INSERT OR REPLACE INTO schema_migration_progress (version, last_key) VALUES (?, ?)",
+            (self.version, last_key)
+        )
+        self.db.conn.commit()
+        if self.progress:
+            self.progress(self.version, self.description, done, total)
+
+def get_schema_version(db):
+    """Versão do esquema gravada no arquivo."""
+    return db.execute_query("PRAGMA user_version").fetchone()[0]
+
+def latest_version():
+    return MIGRATIONS[-1][0] if MIGRATIONS else 0
+
+def run_migrations(db_path, profile=None, batch_size=5000, progress=emit_progress):
+    """
+    Aplica, em ordem, as migrações com versão maior que a do arquivo.
+    :param batch_size: Quantidade de linhas por lote (e por commit) nas migrações pesadas.
+    :param progress: Função chamada a cada lote com (versão, descrição, feitos, total), ou None.
+    Retorna a lista de versões aplicadas.
+    """
+    applied = []
+    with database.DataBaseManager(db_path, profile=profile) as db:
+        # as migrações recriam tabelas (DROP + RENAME): com as chaves estrangeiras ligadas,
+        # o DROP da tabela antiga apagaria as linhas filhas em cascata
+        db.execute_query("PRAGMA foreign_keys = OFF")
+        try:
+            db.create_table('schema_migration_progress', PROGRESS_COLUMNS)
+            current = get_schema_version(db)
+            for version, description, func in MIGRATIONS:
+                if version <= current:
+                    continue
+                func(MigrationContext(db, version, description, batch_size, progress))
+
+                # a versão nova e a limpeza do progresso entram no mesmo commit
+                db.delete('schema_migration_progress', {'version': version})
+                db.execute_query(f"PRAGMA user_version = {int(version)}")
+                db.conn.commit()
+                applied.append(version)
+        finally:
+            if db.conn.in_transaction:
+                db.conn.rollback()
+            db.execute_query("PRAGMA foreign_keys = ON") # a conexão volta ao pool como as outras
+    return applied
+
+def _column_types(db, table_name):
+    """Dicionário {coluna: tipo declarado} da tabela."""
+    return {row['name']: row['type'].upper() for row in db.execute_query(f"PRAGMA table_info({table_name})")}
+
+def rebuild_table(ctx, table_name, columns, select_columns, batched=True):
+    """
+    Recria a tabela com um novo esquema, copiando os dados com as expressões de 'select_columns'.
+    Com batched=True, copia em lotes por rowid (com commit e checkpoint a cada lote) e, no fim,
+    numa única transação, copia o que chegou durante a migração e troca as tabelas.
+    Use batched=False para tabelas pequenas cujas linhas mudam (ex.: saldos em 'accounts').
+    Só uma tabela por migração pode usar batched=True, já que o checkpoint é um por versão.
+    Colunas do esquema novo que a tabela antiga ainda não tem ficam com o valor padrão.
+    """
+    db = ctx.db
+    new_table = f"{table_name}_new"
+    existing = _column_types(db, table_name)
+    column_names = [name for name in columns if ' ' not in name] # ignora as constraints (FOREIGN KEY..., PRIMARY KEY...)
+    copied = [(name, expression) for name, expression in zip(column_names, select_columns) if name in existing]
+    copy_query = (f"INSERT OR REPLACE INTO {new_table} ({', '.join(name for name, _ in copied)}) "
+                  f"SELECT {', '.join(expression for _, expression in copied)} FROM {table_name}")
+
+    # os indices somem junto com a tabela antiga: guarda o SQL deles para recriar na nova
+    index_sql = [row['sql'] for row in db.execute_query(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table_name,)
+    )]
+
+    last_key = ctx.checkpoint() if batched else 0
+    if last_key == 0:
+        db.execute_query(f"DROP TABLE IF EXISTS {new_table}") # sobra de uma tentativa que nem chegou ao primeiro lote
+    db.create_table(new_table, columns)
+
+    if batched:
+        total = db.execute_query(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        done = db.execute_query(f"SELECT COUNT(*) FROM {table_name} WHERE rowid <= ?", (last_key,)).fetchone()[0]
+        while True:
+            upper = db.execute_query(
+                f"SELECT MAX(rowid) FROM (SELECT rowid FROM {table_name} WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                (last_key, ctx.batch_size)
+            ).fetchone()[0]
+            if upper is None:
+                break
+            cursor = db.execute_query(f"{copy_query} WHERE rowid > ? AND rowid <= ?", (last_key, upper))
+            done += cursor.rowcount
+            last_key = upper
+            ctx.save_checkpoint(last_key, done, total)
+
+    # troca final: trava a escrita, copia o restante e renomeia tudo num commit só
+    if db.conn.in_transaction:
+        db.conn.commit()
+    db.execute_query("BEGIN IMMEDIATE")
+    db.execute_query(f"{copy_query} WHERE rowid > ?", (last_key,))
+    db.execute_query(f"DROP TABLE {table_name}")
+    db.execute_query(f"ALTER TABLE {new_table} RENAME TO {table_name}")
+    for sql in index_sql:
+        db.execute_query(sql)
+
+@migration(1, "saldo corrente em transactions.balance_after")
+def add_running_balance(ctx):
+    """Cria a coluna balance_after e preenche o historico, andando de trás pra frente a partir do saldo atual."""
+    db = ctx.db
+    if 'balance_after' not in _column_types(db, 'transactions'):
+        db.add_column('transactions', 'balance_after', 'MONEY')
+
+    total = db.execute_query("SELECT COUNT(*) FROM accounts").fetchone()[0]
+    last_number = ctx.checkpoint()
+    done = db.execute_query("SELECT COUNT(*) FROM accounts WHERE number <= ?", (last_number,)).fetchone()[0]
+    while True:
+        accounts = db.execute_query(
+            "SELECT number, balance FROM accounts WHERE number > ? ORDER BY number LIMIT ?",
+            (last_number, ctx.batch_size)
+        ).fetchall()
+        if not accounts:
+            break
+        for account in accounts:
+            # só as contas que ainda têm transações sem saldo corrente
+            pending = db.execute_query(
+                "SELECT 1 FROM transactions WHERE account_number = ? AND balance_after IS NULL LIMIT 1", (account['number'],)
+            ).fetchone()
+            if pending is None:
+                continue
+            balance = account['balance']
+            updates = []
+            rows = db.execute_query(
+                "SELECT id, transaction_type, value FROM transactions WHERE account_number = ? ORDER BY id DESC",
+                (account['number'],)
+            )
+            for row in rows:
+                updates.append((balance, row['id']))
+                balance -= database.signed_value(row['transaction_type'], row['value'])
+            db.conn.executemany("UPDATE transactions SET balance_after = ? WHERE id = ?", updates)
+        last_number = accounts[-1]['number']
+        done += len(accounts)
+        ctx.save_checkpoint(last_number, done, total)
+
+@migration(2, "dinheiro em centavos inteiros (MONEY) no lugar de REAL")
+def money_to_cents(ctx):
+    """Recria as tabelas que ainda guardam reais como REAL, convertendo para centavos."""
+    tables = (
+        ('accounts', database.ACCOUNT_COLUMNS, False),
+        ('transactions', database.TRANSACTION_COLUMNS, True),
+    )
+    for table_name, columns, batched in tables:
+        money_columns = database.MONEY_COLUMNS[table_name]
+        column_types = _column_types(ctx.db, table_name)
+        if not any(column_types.get(column) == 'REAL' for column in money_columns):
+            continue # já está em centavos
+        select_columns = [
+            f"CAST(ROUND({name} * 100) AS INTEGER)" if name in money_columns else name
+            for name in columns if ' ' not in name
+        ]
+        rebuild_table(ctx, table_name, columns, select_columns, batched=batched)
+
+@migration(3, "indices do extrato e das contas por cpf")
+def statement_indexes(ctx):
+    """Indices: o extrato busca por conta em ordem de id, e as contas são buscadas por cpf."""
+    ctx.db.create_index('idx_accounts_client_cpf', 'accounts', ['client_cpf'])
+    ctx.db.create_index('idx_transactions_account_id', 'transactions', ['account_number', 'id'])
+
+@migration(4, "contador diario de saques por conta")
+def daily_withdrawal_counters(ctx):
+    """Cria a tabela de saques por dia e conta os saques de hoje que já estão no extrato."""
+    db = ctx.db
+    db.create_table('daily_withdrawals', database.DAILY_WITHDRAWAL_COLUMNS)
+    now = datetime.now()
+    # as datas do extrato ainda são texto 'dd-mm-YYYY HH:MM:SS': o prefixo identifica o dia de hoje
+    db.execute_query(
+        "INSERT OR REPLACE INTO daily_withdrawals (account_number, day, count) "
+        "SELECT account_number, ?, COUNT(*) FROM transactions "
+        "WHERE transaction_type = ? AND date LIKE ? GROUP BY account_number",
+        (now.strftime("%Y-%m-%d"), database.WITHDRAW, now.strftime("%d-%m-%Y") + "%")
+    )
+
+@migration(5, "datas do extrato em ISO 8601 e indice por conta e data")
+def iso_transaction_dates(ctx):
+    """Converte transactions.date de 'dd-mm-YYYY HH:MM:SS' para 'YYYY-mm-dd HH:MM:SS', em lotes por rowid."""
+    db = ctx.db
+    total = db.execute_query("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    last_key = ctx.checkpoint()
+    done = db.execute_query("SELECT COUNT(*) FROM transactions WHERE rowid <= ?", (last_key,)).fetchone()[0]
+    while True:
+        upper = db.execute_query(
+            "SELECT MAX(rowid) FROM (SELECT rowid FROM transactions WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+            (last_key, ctx.batch_size)
+        ).fetchone()[0]
+        if upper is None:
+            break
+        # só as linhas ainda no formato antigo (o 3º caractere é o '-' de 'dd-')
+        db.execute_query(
+            "UPDATE transactions SET date = substr(date, 7, 4) || '-' || substr(date, 4, 2) || '-' || substr(date, 1, 2) || substr(date, 11) "
+            "WHERE rowid > ? AND rowid <= ? AND substr(date, 3, 1) = '-'",
+            (last_key, upper)
+        )
+        done += db.execute_query("SELECT COUNT(*) FROM transactions WHERE rowid > ? AND rowid <= ?", (last_key, upper)).fetchone()[0]
+        last_key = upper
+        ctx.save_checkpoint(last_key, done, total)
+    db.create_index('idx_transactions_account_date', 'transactions', ['account_number', 'date'])
+
+def set_aside(db, table_name, condition):
+    """
+    Move as linhas de 'table_name' que atendem 'condition' para a tabela 'orphaned_<table_name>'
+    (criada com as mesmas colunas), em vez de apagar. Retorna quantas linhas foram movidas.
+    """
+    orphan_table = f"orphaned_{table_name}"
+    db.execute_query(f"CREATE TABLE IF NOT EXISTS {orphan_table} AS SELECT * FROM {table_name} WHERE 0")
+    db.execute_query(f"INSERT INTO {orphan_table} SELECT * FROM {table_name} WHERE {condition}")
+    return db.execute_query(f"DELETE FROM {table_name} WHERE {condition}").rowcount
+
+@migration(6, "chaves estrangeiras com ON DELETE CASCADE")
+def foreign_key_cascade(ctx):
+    """
+    Recria as tabelas filhas com ON DELETE CASCADE, para a exclusão de cliente/conta ser um DELETE só.
+    Antes, as linhas órfãs (de contas ou clientes que já não existem), que as chaves recusariam, vão para
+    tabelas 'orphaned_<tabela>' e a quantidade sai no evento 'db.migration_orphans': nada do extrato é apagado.
+    """
+    db = ctx.db
+    tables = (
+        ('accounts', database.ACCOUNT_COLUMNS, False),
+        ('transactions', database.TRANSACTION_COLUMNS, True),
+        ('daily_withdrawals', database.DAILY_WITHDRAWAL_COLUMNS, False),
+    )
+    for table_name, columns, _ in tables:
+        db.create_table(table_name, columns) # tabela que ainda não existia já nasce com a cascata
+    # as contas primeiro: as linhas das contas que saírem também viram órfãs
+    orphans = {'accounts': set_aside(db, 'accounts', "client_cpf NOT IN (SELECT cpf FROM clients)")}
+    for table_name, _, _ in tables[1:]:
+        orphans[table_name] = set_aside(db, table_name, "account_number NOT IN (SELECT number FROM accounts)")
+    db.conn.commit()
+    orphans = {table_name: count for table_name, count in orphans.items() if count}
+    if orphans:
+        events.emit(events.WARNING, 'db.migration_orphans',
+                    "Migração {version}: {total} linhas órfãs movidas para as tabelas orphaned_*: {orphans}",
+                    version=ctx.version, total=sum(orphans.values()), orphans=orphans)
+
+    for table_name, columns, batched in tables:
+        foreign_keys = db.execute_query(f"PRAGMA foreign_key_list({table_name})").fetchall()
+        if foreign_keys and all(row['on_delete'] == 'CASCADE' for row in foreign_keys):
+            continue # já está no esquema novo
+        select_columns = [name for name in columns if ' ' not in name]
+        rebuild_table(ctx, table_name, columns, select_columns, batched=batched)
+
+@migration(7, "arquivo morto: saldo carregado nas contas")
+def archive_columns(ctx):
+    """Colunas das contas usadas pelo arquivo morto (database.archive_transactions)."""
+    ctx.db.add_column('accounts', 'archived_balance', 'MONEY')
+    ctx.db.add_column('accounts', 'archived_until', 'TEXT')
+
+@migration(8, "remove as fotos de saldo")
+def drop_balance_snapshots(ctx):
+    """O saldo historico sai do balance_after das transações (veja database.get_balance_at); as fotos não eram lidas."""
+    ctx.db.execute_query("DROP TABLE IF EXISTS balance_snapshots")
+
+if __name__ == "__main__":
+    # python -m engine.migrations: atualiza o banco padrão mostrando o progresso
+    events.subscribe(events.print_subscriber, events.INFO)
+    database.create_project_tables()
+    print(f"Esquema na versão {latest_version()}.")
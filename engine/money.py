@@ -0,0 +1,173 @@
+import operator
+import re
+import sqlite3
+from decimal import Decimal, ROUND_HALF_UP
+
+# "1234.56" (ponto decimal, sem milhar) ou o formato brasileiro "1.234,56" / "1234,56"; no maximo 2 casas.
+# Ponto de milhar só vale com a virgula dos centavos: "10.005" sozinho não dá pra saber o que é
+_PLAIN_TEXT = re.compile(r"[+-]?\d+(\.\d{1,2})?")
+_BRAZILIAN_TEXT = re.compile(r"[+-]?(\d{1,3}(\.\d{3})+,\d{1,2}|\d+(,\d{1,2})?)")
+
+def _parse_text(value):
+    """Lê o texto digitado sem adivinhar: separador misturado ou mais de 2 casas decimais gera ValueError."""
+    text = value.replace("R$", "").strip()
+    if _PLAIN_TEXT.fullmatch(text):
+        return Decimal(text)
+    if _BRAZILIAN_TEXT.fullmatch(text):
+        return Decimal(text.replace(".", "").replace(",", "."))
+    raise ValueError(f"Valor monetario invalido: {value!r}")
+
+def to_cents(value):
+    """
+    Converte um valor em reais para centavos inteiros, arredondando meio centavo pra cima.
+    Aceita Money, int, float, Decimal ou texto ("10.50", "10,50", "R$ 1.234,56"); texto com mais
+    de 2 casas ou com os separadores trocados ("1,234.56") gera ValueError em vez de ser arredondado.
+    """
+    value_type = type(value)
+    if value_type is Money:
+        return value._cents
+    if value_type is int:
+        return value * 100
+    if isinstance(value, bool):
+        raise TypeError("Valor monetario não pode ser booleano.")
+    if isinstance(value, Money):
+        return value.cents
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, float):
+        value = Decimal(repr(value)) # repr evita levar o erro binario do float pro Decimal
+    elif isinstance(value, str):
+        value = _parse_text(value)
+    elif not isinstance(value, Decimal):
+        raise TypeError(f"Tipo não suportado como valor monetario: {type(value).__name__}")
+
+    if not value.is_finite():
+        raise ValueError(f"Valor monetario invalido: {value!r}")
+    return int((value * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+class Money:
+    """Valor em reais guardado como um inteiro de centavos: somas e comparações exatas."""
+
+    __slots__ = ('_cents',)
+
+    def __init__(self, value=0):
+        """Recebe o valor em reais (Money(10.5) é R$ 10,50). Para centavos use Money.from_cents."""
+        self._cents = to_cents(value)
+
+    @classmethod
+    def from_cents(cls, cents):
+        money = cls.__new__(cls)
+        money._cents = int(cents)
+        return money
+
+    @property
+    def cents(self):
+        return self._cents
+
+    @property
+    def amount(self):
+        """Valor em reais como Decimal (ex.: Decimal('10.50'))."""
+        return Decimal(self._cents).scaleb(-2)
+
+    @staticmethod
+    def _exact_decimal(other):
+        """O outro operando como Decimal exato (float pelo repr, 0.1 vira Decimal('0.1')), ou None."""
+        if isinstance(other, float):
+            other = Decimal(repr(other))
+        if isinstance(other, Decimal) and other.is_finite():
+            return other
+        return None
+
+    def _other_cents(self, other):
+        """
+        Centavos exatos do outro operando, ou None se ele não for Money, int, float ou Decimal (ou tiver fração de centavo).
+        Texto só vira dinheiro no construtor, e fração de centavo nunca é arredondada escondida numa conta.
+        """
+        other_type = type(other)
+        if other_type is Money: # caminho rapido: é o caso mais comum nas contas
+            return other._cents
+        if other_type is int:
+            return other * 100
+        if isinstance(other, Money):
+            return other.cents
+        exact = self._exact_decimal(other)
+        if exact is not None:
+            cents = exact * 100
+            if cents == cents.to_integral_value():
+                return int(cents)
+        return None
+
+    def _compare(self, other, compare):
+        other_cents = self._other_cents(other)
+        if other_cents is not None:
+            return compare(self._cents, other_cents)
+        exact = self._exact_decimal(other)
+        if exact is not None:
+            return compare(self.amount, exact) # fração de centavo: compara o valor exato, sem arredondar
+        return NotImplemented
+
+    def __eq__(self, other):
+        return self._compare(other, operator.eq)
+
+    def __lt__(self, other):
+        return self._compare(other, operator.lt)
+
+    def __le__(self, other):
+        return self._compare(other, operator.le)
+
+    def __gt__(self, other):
+        return self._compare(other, operator.gt)
+
+    def __ge__(self, other):
+        return self._compare(other, operator.ge)
+
+    def __hash__(self):
+        # mesmo hash do int/Decimal igual, já que Money(1) == 1 e Money(1) == Decimal('1.00')
+        # (e do float com valor inteiro; floats como 0.1 não são exatos em binario e ficam de fora)
+        return hash(self.amount)
+
+    def __add__(self, other):
+        other_cents = self._other_cents(other)
+        if other_cents is None:
+            return NotImplemented
+        return Money.from_cents(self._cents + other_cents)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        other_cents = self._other_cents(other)
+        if other_cents is None:
+            return NotImplemented
+        return Money.from_cents(self._cents - other_cents)
+
+    def __rsub__(self, other):
+        other_cents = self._other_cents(other)
+        if other_cents is None:
+            return NotImplemented
+        return Money.from_cents(other_cents - self._cents)
+
+    def __neg__(self):
+        return Money.from_cents(-self._cents)
+
+    def __bool__(self):
+        return self._cents != 0
+
+    def __float__(self):
+        return self._cents / 100
+
+    def __format__(self, format_spec):
+        return format(self.amount, format_spec or ".2f")
+
+    def __str__(self):
+        return format(self, ".2f")
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+def register_sqlite_types():
+    """
+    Ensina o sqlite3 a gravar Money como inteiro de centavos e a devolver
+    as colunas declaradas como MONEY já como Money (precisa de detect_types=PARSE_DECLTYPES).
+    """
+    sqlite3.register_adapter(Money, lambda money: money.cents)
+    sqlite3.register_converter("MONEY", lambda raw: Money.from_cents(int(raw)))
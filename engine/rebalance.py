@@ -0,0 +1,26 @@
+"""
+Move uma faixa de contas de um shard para outro e grava o mapa novo dos shards.
+Uso: python -m engine.rebalance shards.json primeiro_numero ultimo_numero shard_destino
+"""
+import sys
+
+from engine import database
+
+def main(argv):
+    if len(argv) != 4:
+        print(__doc__.strip())
+        return 1
+    config_path, first, last, target = argv[0], int(argv[1]), int(argv[2]), argv[3]
+    router = database.ShardRouter.load(config_path)
+    try:
+        moved = router.rebalance(first, last, target, config_path=config_path)
+    except ValueError as error:
+        print(error)
+        return 1
+    finally:
+        database.close_all_pools()
+    print(f"{moved} contas movidas para o shard '{target}'.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
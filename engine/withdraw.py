@@ -1,8 +1,9 @@
 from engine.transaction import Transaction
+from engine.money import Money
 
 class Withdraw(Transaction):
     def __init__(self, value):
-        self._value = value
+        self._value = Money(value)
     
     @property
     def value(self):
@@ -0,0 +1,163 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from engine import database
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_MAX_PENDING = 10000
+
+class WriterQueue():
+    """
+    Escritor unico de um arquivo do banco: todas as escritas entram numa fila
+    e uma thread as aplica em grupos, com um BEGIN IMMEDIATE e um só commit por grupo (group commit).
+    Cada operação roda dentro de um SAVEPOINT proprio, então o erro de uma não desfaz as outras do grupo.
+    Operações que precisam controlar a propria transação (ATTACH, commits em etapas) entram com
+    submit_exclusive() e rodam sozinhas, fora do grupo, mas ainda nesta mesma thread.
+    Quem chama recebe um Future com o resultado, preenchido só depois do commit.
+    """
+
+    _STOP = object()
+
+    def __init__(self, db_path=None, profile=None, max_batch=DEFAULT_MAX_BATCH, flush_interval=0.0, max_pending=DEFAULT_MAX_PENDING):
+        """
+        :param db_path: Arquivo do banco (padrão: database.DB_PATH).
+        :param profile: Perfil de durabilidade das conexões usadas pela thread.
+        :param max_batch: Maximo de operações por commit.
+        :param flush_interval: Segundos que a thread espera por mais operações antes do commit.
+                               Com 0, o grupo é o que já estava na fila (o que chegou durante o commit anterior).
+        :param max_pending: Tamanho maximo da fila; passado disso, submit() bloqueia quem chama.
+        """
+        self.db_path = db_path or database.DB_PATH
+        self.profile = profile
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name="db-writer-queue", daemon=True)
+        self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Enfileira func(db, *args, **kwargs), onde 'db' é o DataBaseManager do grupo (sem commit dentro de func).
+        Retorna um Future com o valor devolvido pela função.
+        """
+        future = Future()
+        self._queue.put((future, func, args, kwargs, False))
+        return future
+
+    def submit_exclusive(self, func, *args, **kwargs):
+        """
+        Enfileira func(db, *args, **kwargs) para rodar sozinha, sem transação aberta: a função faz os proprios
+        commits (o que sobrar aberto é confirmado no fim). As outras escritas do arquivo esperam ela terminar.
+        """
+        future = Future()
+        self._queue.put((future, func, args, kwargs, True))
+        return future
+
+    def post(self, account_number, transaction_type, value):
+        """Enfileira um depósito/saque (veja database._post). O Future traz o novo saldo ou None."""
+        return self.submit(database._post, account_number, transaction_type, value)
+
+    def close(self):
+        """Aplica o que já está na fila e encerra a thread."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def _next_group(self):
+        """Espera a primeira operação e junta as seguintes até o grupo encher ou o tempo acabar."""
+        group = [self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while group[-1] is not self._STOP and len(group) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                group.append(self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    def _run(self):
+        while True:
+            group = self._next_group()
+            stop = group[-1] is self._STOP
+            if stop:
+                group.pop()
+            # as operações normais seguidas vão num commit só; as exclusivas, uma por vez
+            for exclusive, operations in itertools.groupby(group, key=lambda operation: operation[4]):
+                if exclusive:
+                    for operation in operations:
+                        self._apply_exclusive(operation)
+                else:
+                    self._apply(list(operations))
+            if stop:
+                return
+
+    def _apply(self, group):
+        """Aplica o grupo numa transação só e entrega os resultados depois do commit."""
+        results = []
+        try:
+            with database.DataBaseManager(self.db_path, profile=self.profile) as db:
+                db.execute_query("BEGIN IMMEDIATE")
+                for future, func, args, kwargs, _ in group:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    db.execute_query("SAVEPOINT writer_op")
+                    try:
+                        results.append((future, func(db, *args, **kwargs), None))
+                    except Exception as exc:
+                        db.execute_query("ROLLBACK TO writer_op")
+                        results.append((future, None, exc))
+                    db.execute_query("RELEASE writer_op")
+        except Exception as exc:
+            # o commit (ou o BEGIN) falhou: nada do grupo foi gravado
+            for future, *_ in group:
+                if future.running():
+                    future.set_exception(exc)
+            return
+
+        for future, result, exc in results:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+    def _apply_exclusive(self, operation):
+        future, func, args, kwargs, _ = operation
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            with database.DataBaseManager(self.db_path, profile=self.profile) as db:
+                result = func(db, *args, **kwargs)
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+def get_writer(db_path, profile=None):
+    """
+    Retorna a fila de escrita do arquivo, criando na primeira chamada. É uma fila (um escritor) por arquivo,
+    com o perfil de durabilidade de quem a criou (None = database.DB_PROFILE). Pedir a fila com outro
+    perfil enquanto ela roda gera ValueError, em vez de abrir um segundo escritor no mesmo arquivo.
+    """
+    profile = profile or database.DB_PROFILE
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = WriterQueue(db_path, profile=profile)
+            _writers[db_path] = writer
+        elif writer.profile != profile:
+            raise ValueError(f"A fila de escrita de {db_path} já roda com o perfil '{writer.profile}', não '{profile}'.")
+        return writer
+
+def close_all_writers():
+    """Encerra todas as filas de escrita, aplicando o que ainda estava pendente."""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
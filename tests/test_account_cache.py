@@ -0,0 +1,68 @@
+from engine.account_cache import AccountCache
+from engine.checkingAccount import CheckingAccount
+from engine.individual import Individual
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self):
+        return self.now
+
+def make_client(cpf, *account_numbers):
+    client = Individual(name=f"Cliente {cpf}", birth_date="01-01-1990", cpf=cpf, address="Rua C")
+    for number in account_numbers:
+        client.add_account(CheckingAccount(number=number, client=client))
+    return client
+
+def test_hit_miss_and_lookup_by_account():
+    """Testa os contadores e a busca pelo CPF e pelo numero da conta."""
+    # arrange
+    cache = AccountCache()
+    client = make_client("111", 1, 2)
+
+    # act
+    missing = cache.get_client("111")
+    cache.put(client)
+
+    # assert
+    assert missing is None
+    assert cache.get_client("111") is client
+    assert cache.get_account(2) is client.accounts[1]
+    assert cache.get_account(99) is None
+    assert cache.stats() == {'hits': 2, 'misses': 2, 'size': 1}
+
+def test_lru_eviction_and_ttl():
+    """Testa se o cliente menos usado sai primeiro e se as entradas expiram."""
+    # arrange
+    clock = FakeClock()
+    cache = AccountCache(max_clients=2, ttl=10, clock=clock)
+    cache.put(make_client("1", 1))
+    cache.put(make_client("2", 2))
+    cache.get_client("1") # "1" passa a ser o mais recente
+
+    # act
+    cache.put(make_client("3", 3))
+
+    # assert
+    assert cache.get_client("2") is None
+    assert cache.get_account(2) is None
+    assert cache.get_client("1") is not None
+    clock.now = 11
+    assert cache.get_client("1") is None
+    assert cache.stats()['size'] == 1
+
+def test_update_balance_and_invalidate():
+    """Testa o write-through do saldo e a invalidação pela conta."""
+    # arrange
+    cache = AccountCache()
+    client = make_client("111", 1)
+    cache.put(client)
+
+    # act
+    cache.update_balance(1, 42)
+    balance = client.accounts[0].balance
+    cache.invalidate_account(1)
+
+    # assert
+    assert balance == 42
+    assert cache.get_client("111") is None
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import pytest
+from engine import database as db
+from engine.async_database import AsyncDatabase
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Banco temporario com as tabelas do projeto."""
+    path = str(tmp_path / "async.db")
+    monkeypatch.setattr(db, 'DB_PATH', path)
+    db.create_project_tables()
+    yield path
+    db.close_all_pools()
+
+def test_concurrent_posts_and_reads(db_path):
+    """Testa muitas operações concorrentes dividindo poucas conexões, sem perder nenhum lançamento."""
+    async def scenario():
+        async with AsyncDatabase(readers=2, max_pending=16) as adb:
+            # arrange
+            await adb.add_client("123", "Cliente Async", "01-01-1990", "Rua A")
+            account_number = await adb.add_account("0001", 0, "123")
+
+            # act: 500 depósitos e 100 leituras disparados ao mesmo tempo
+            deposits = [adb.post_transaction(account_number, db.DEPOSIT, 1) for _ in range(500)]
+            reads = [adb.count_transactions(account_number) for _ in range(100)]
+            results = await asyncio.gather(*deposits, *reads)
+            transactions = await adb.get_transactions_by_account(account_number)
+            accounts = await adb.get_accounts_by_client("123")
+            return results[:500], transactions, accounts
+
+    balances, transactions, accounts = asyncio.run(scenario())
+
+    # assert
+    assert sorted(balances) == list(range(1, 501))
+    assert len(transactions) == 500
+    assert accounts[0]['balance'] == 500
+
+def test_writes_run_on_a_single_thread(db_path, monkeypatch):
+    """Testa se todas as escritas passam pela thread da fila de escrita."""
+    # arrange
+    threads = set()
+    original = db._add_client
+    def spy(*args):
+        threads.add(threading.current_thread().name)
+        return original(*args)
+    monkeypatch.setattr(db, '_add_client', spy)
+
+    async def scenario():
+        async with AsyncDatabase() as adb:
+            await asyncio.gather(*(adb.add_client(str(cpf), "Cliente", "01-01-1990", "Rua B") for cpf in range(50)))
+            return await adb.get_all_clients()
+
+    # act
+    clients = asyncio.run(scenario())
+
+    # assert
+    assert len(clients) == 50
+    assert threads == {"db-writer-queue"}
+
+def test_post_batch_writes_group_by_group(db_path, monkeypatch):
+    """Testa se o post_batch manda cada grupo como uma escrita da fila (com vaga limitada, como as outras)."""
+    # arrange
+    groups = []
+    original = db._post_group
+    def spy(manager, group):
+        groups.append(len(group))
+        return original(manager, group)
+    monkeypatch.setattr(db, '_post_group', spy)
+
+    async def scenario():
+        async with AsyncDatabase(max_pending=1) as adb:
+            await adb.add_client("123", "Cliente Lote", "01-01-1990", "Rua C")
+            account_number = await adb.add_account("0001", 0, "123")
+            # act
+            result = await adb.post_batch([(account_number, db.DEPOSIT, 1)] * 5 + [(account_number, db.WITHDRAW, 99)], group_size=4)
+            return result, await adb.get_accounts_by_client("123")
+
+    (accepted, rejected), accounts = asyncio.run(scenario())
+
+    # assert
+    assert groups == [4, 2]
+    assert accepted == 5
+    assert len(rejected) == 1
+    assert accounts[0]['balance'] == 5
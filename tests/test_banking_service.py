@@ -0,0 +1,69 @@
+import pytest
+from datetime import date
+from engine import database as db
+from engine.banking_service import BankingService
+from engine.event_log import EventLog
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """Serviço apontando para um banco temporario, com log de eventos."""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / "service.db"))
+    db.create_project_tables()
+    event_log = EventLog(str(tmp_path / "eventos.jsonl"))
+    yield BankingService(event_log=event_log)
+    event_log.close()
+    db.close_all_pools()
+
+def test_full_flow_without_gui(service):
+    """Testa o fluxo completo (cadastro, conta, depósito, saque e extrato) sem interface grafica."""
+    # arrange
+    assert service.create_client("123", "Cliente Serviço", date(1990, 5, 17), "Rua H") is True
+    account_number = service.create_account("123")
+
+    # act
+    client = service.load_client("123")
+    account = client.accounts[0]
+    service.deposit(account, "100,00")
+    service.withdraw(account, 30)
+    refused = service.withdraw(account_number, 1000)
+
+    # assert
+    assert account.number == account_number
+    assert account.balance == 70
+    assert refused is None
+    assert [row['value'] for row in service.statement(account)] == [100, 30]
+    assert [event['event'] for event in service.event_log.find(account_number=account_number)] == [
+        "conta_criada", "deposito", "saque", "saque_recusado"
+    ]
+
+def test_create_client_rejects_minors(service):
+    """Testa se o serviço recusa clientes menores de idade."""
+    today = date.today()
+    with pytest.raises(ValueError):
+        service.create_client("456", "Menor", date(today.year - 10, 1, 1), "Rua I")
+    assert service.load_client("456") is None
+
+def test_client_age():
+    """Testa o calculo da idade antes e depois do aniversario."""
+    assert BankingService.client_age(date(2000, 6, 15), today=date(2018, 6, 14)) == 17
+    assert BankingService.client_age(date(2000, 6, 15), today=date(2018, 6, 15)) == 18
+
+def test_load_client_uses_cache_with_write_through(service):
+    """Testa se o segundo carregamento vem do cache e se os lançamentos mantêm o saldo em dia."""
+    # arrange
+    service.create_client("789", "Cliente Cache", date(1990, 1, 1), "Rua J")
+    account_number = service.create_account("789")
+    first = service.load_client("789")
+
+    # act: lançamento pelo numero da conta, sem passar o objeto
+    service.deposit(account_number, 25)
+    second = service.load_client("789")
+    new_account = service.create_account("789")
+    third = service.load_client("789")
+
+    # assert
+    assert second is first
+    assert second.accounts[0].balance == 25
+    assert third is not first
+    assert [account.number for account in third.accounts] == [account_number, new_account]
+    assert service.cache.stats()['hits'] == 1
@@ -64,4 +64,20 @@ def test_withdraw_with_insufficient_funds_but_within_limit(sample_checking_accou
     # assert
     assert success is False
     assert account.balance == 300.0, "O saldo não deve mudar se for insuficiente."
-    
\ No newline at end of file
+    
+def test_withdraw_respects_daily_withdrawal_limit():
+    """
+    Testa se a conta recusa saques depois de atingir a quantidade de saques do dia.
+    """
+    # arrange
+    client = Individual(name="Cliente Saques", birth_date="01-01-1990", cpf="456", address="Rua Teste")
+    account = CheckingAccount(number=2, client=client, limit=500, withdrawn_limit=2)
+    account.deposit(100.0)
+
+    # act
+    results = [account.withdraw(10.0) for _ in range(3)]
+
+    # assert
+    assert results == [True, True, False]
+    assert account.withdrawals_today == 2
+    assert account.balance == 80.0
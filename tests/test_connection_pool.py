@@ -0,0 +1,89 @@
+import sqlite3
+import pytest
+from engine import database as db
+from engine.connection_pool import ConnectionPool
+
+@pytest.fixture
+def pool(tmp_path):
+    """Cria um pool pequeno apontando para um banco temporario."""
+    pool = ConnectionPool(str(tmp_path / "pool.db"), size=2, timeout=0.1)
+    yield pool
+    pool.close()
+
+def test_connection_is_reused(pool):
+    """Testa se a mesma conexão volta para o pool e é reaproveitada."""
+    # arrange
+    first = pool.acquire()
+    pool.release(first)
+
+    # act
+    second = pool.acquire()
+
+    # assert
+    assert second is first
+    assert pool.opened == 1
+
+def test_pool_respects_size(pool):
+    """Testa se o pool não abre mais conexões que o tamanho configurado."""
+    # arrange: ocupa todas as conexões
+    pool.acquire()
+    pool.acquire()
+
+    # act & assert
+    with pytest.raises(sqlite3.OperationalError):
+        pool.acquire()
+    assert pool.opened == 2
+
+def test_pragmas_are_applied_once(tmp_path):
+    """Testa se os pragmas configurados são aplicados na abertura da conexão."""
+    pool = ConnectionPool(str(tmp_path / "pragmas.db"), pragmas={'cache_size': -1234})
+    conn = pool.acquire()
+
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -1234
+    pool.release(conn)
+    pool.close()
+
+def test_broken_connection_is_replaced(pool):
+    """Testa se uma conexão que falha no health check é trocada por uma nova."""
+    # arrange: força o health check e "quebra" a conexão que está no pool
+    pool.health_check_interval = 0
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    # act
+    new_conn = pool.acquire()
+
+    # assert
+    assert new_conn is not conn
+    assert new_conn.execute("SELECT 1").fetchone()[0] == 1
+    assert pool.opened == 1
+
+def test_manager_rollback_returns_clean_connection(pool):
+    """Testa se um erro dentro do 'with' desfaz a transação e devolve a conexão limpa."""
+    with db.DataBaseManager(pool.db_path, pool=pool) as manager:
+        manager.create_table('items', {'id': 'INTEGER PRIMARY KEY'})
+
+    with pytest.raises(RuntimeError):
+        with db.DataBaseManager(pool.db_path, pool=pool) as manager:
+            manager.insert('items', {'id': 1})
+            raise RuntimeError("falha no meio da operação")
+
+    with db.DataBaseManager(pool.db_path, pool=pool) as manager:
+        assert manager.select('items') == []
+        assert manager.conn.in_transaction is False
+
+def test_durability_profile_pragmas(tmp_path):
+    """Testa se o perfil 'balanced' liga o WAL com synchronous=NORMAL."""
+    pool = ConnectionPool(str(tmp_path / "profile.db"), profile='balanced')
+    conn = pool.acquire()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1 # 1 = NORMAL
+    pool.release(conn)
+    pool.close()
+
+def test_unknown_profile_raises_error(tmp_path):
+    """Testa se um perfil inexistente é recusado."""
+    with pytest.raises(ValueError):
+        ConnectionPool(str(tmp_path / "profile.db"), profile='turbo')
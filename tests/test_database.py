@@ -1,6 +1,9 @@
 import pytest
 import os
+import sqlite3
+from contextlib import contextmanager
 from engine import database as db
+from engine.money import Money
 
 # O pytest nos fornece o 'tmp_path', um diretório temporário para nossos testes.
 # O 'monkeypatch' nos permite modificar o comportamento de outros módulos.
@@ -25,8 +28,9 @@ def setup_test_database(tmp_path, monkeypatch):
     #    Nenhum código é necessário aqui, pois o banco já está pronto.
     yield
 
-    # 5. O código após o yield (nenhum neste caso) rodaria para limpeza,
-    #    mas o tmp_path do pytest já cuida de apagar tudo automaticamente.
+    # 5. O tmp_path do pytest já cuida de apagar o arquivo, mas as conexões
+    #    que ficaram abertas no pool precisam ser fechadas.
+    db.close_all_pools()
 
 def test_add_and_get_client(setup_test_database):
     """
@@ -217,4 +221,503 @@ def test_delete_without_condition_raises_error(setup_test_database):
         with pytest.raises(ValueError) as excinfo_none:
             manager.delete('clients', None) # Tenta deletar com None.
         
-        assert "necessario uma condição" in str(excinfo_none.value)
\ No newline at end of file
+        assert "necessario uma condição" in str(excinfo_none.value)
+
+def test_post_transaction_deposit_and_withdraw(setup_test_database):
+    """Testa se depósito e saque atualizam o saldo e o extrato na mesma operação."""
+    # arrange
+    client_cpf = "55566677788"
+    db.add_client(client_cpf, "Cliente Posting", "01-01-1990", "Rua B")
+    account_number = db.add_account("0001", 100.0, client_cpf)
+
+    # act
+    balance_after_deposit = db.post_transaction(account_number, db.DEPOSIT, 50.0)
+    balance_after_withdraw = db.post_transaction(account_number, db.WITHDRAW, 30.0)
+
+    # assert
+    assert balance_after_deposit == 150.0
+    assert balance_after_withdraw == 120.0
+    assert db.get_accounts_by_client(client_cpf)[0]['balance'] == 120.0
+    transactions = db.get_transactions_by_account(account_number)
+    assert [t['transaction_type'] for t in transactions] == [db.DEPOSIT, db.WITHDRAW]
+
+def test_post_transaction_rejects_insufficient_funds_and_limit(setup_test_database):
+    """Testa se saques sem saldo ou acima do limite são recusados sem mexer em nada."""
+    # arrange
+    client_cpf = "55566677788"
+    db.add_client(client_cpf, "Cliente Posting", "01-01-1990", "Rua B")
+    account_number = db.add_account("0001", 1000.0, client_cpf)
+
+    # act
+    over_limit = db.post_transaction(account_number, db.WITHDRAW, 600.0) # limite padrão é 500
+    db.update_account_balance(account_number, 10.0)
+    no_funds = db.post_transaction(account_number, db.WITHDRAW, 20.0)
+    no_account = db.post_transaction(9999, db.DEPOSIT, 20.0)
+
+    # assert
+    assert over_limit is None
+    assert no_funds is None
+    assert no_account is None
+    assert db.get_accounts_by_client(client_cpf)[0]['balance'] == 10.0
+    assert len(db.get_transactions_by_account(account_number)) == 0
+
+def test_post_batch_applies_valid_entries_per_group(setup_test_database):
+    """Testa se o lote grava os lançamentos validos e recusa os que quebram as regras da conta."""
+    # arrange
+    client_cpf = "99988877766"
+    db.add_client(client_cpf, "Cliente Lote", "01-01-1990", "Rua do Lote")
+    account_a = db.add_account("0001", 100.0, client_cpf)
+    account_b = db.add_account("0001", 0, client_cpf)
+    entries = [
+        (account_a, db.DEPOSIT, 50.0),
+        (account_a, db.WITHDRAW, 120.0),
+        (account_b, db.WITHDRAW, 10.0),   # sem saldo
+        (account_b, db.DEPOSIT, 1000.0),
+        (account_b, db.WITHDRAW, 600.0),  # acima do limite por operação
+        (9999, db.DEPOSIT, 10.0),         # conta inexistente
+        (account_b, db.WITHDRAW, 400.0),
+        (account_a, db.DEPOSIT, 'abc'),   # valor invalido
+        (account_a, db.DEPOSIT, None),
+    ]
+
+    # act: grupos de 3 forçam varios commits
+    accepted, rejected = db.post_batch(entries, group_size=3)
+
+    # assert
+    assert accepted == 4
+    assert rejected == [entries[2], entries[4], entries[5], entries[7], entries[8]]
+    balances = {acc['number']: acc['balance'] for acc in db.get_accounts_by_client(client_cpf)}
+    assert balances == {account_a: 30.0, account_b: 600.0}
+    assert len(db.get_transactions_by_account(account_a)) == 2
+    assert len(db.get_transactions_by_account(account_b)) == 2
+
+def test_statement_query_uses_index(setup_test_database):
+    """Testa se a consulta do extrato usa o indice (account_number, id), sem varrer a tabela toda."""
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        plan = manager.execute_query(
+            "EXPLAIN QUERY PLAN SELECT * FROM transactions WHERE account_number = ? ORDER BY id ASC", (1,)
+        ).fetchall()
+        details = " ".join(row['detail'] for row in plan)
+
+        accounts_plan = manager.execute_query(
+            "EXPLAIN QUERY PLAN SELECT * FROM accounts WHERE client_cpf = ?", ("123",)
+        ).fetchall()
+
+    assert "USING INDEX idx_transactions_account_id" in details
+    assert "TEMP B-TREE" not in details, "A ordenação deveria vir do indice, sem sort extra."
+    assert "USING INDEX idx_accounts_client_cpf" in accounts_plan[0]['detail']
+
+def test_create_index_is_idempotent(setup_test_database):
+    """Testa se criar o mesmo indice duas vezes não gera erro."""
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.create_index('idx_clients_name', 'clients', ['name'])
+        manager.create_index('idx_clients_name', 'clients', ['name'])
+        indexes = manager.select('sqlite_master', columns='name', condition={'type': 'index', 'name': 'idx_clients_name'})
+
+    assert len(indexes) == 1
+
+def test_get_statement_page_keyset_pagination(setup_test_database):
+    """Testa se as paginas do extrato vêm em ordem, sem repetir nem pular transações."""
+    # arrange
+    client_cpf = "12312312312"
+    db.add_client(client_cpf, "Cliente Extrato", "01-01-1990", "Rua C")
+    account_number = db.add_account("0001", 0, client_cpf)
+    for value in range(1, 8):
+        db.add_transaction(account_number, db.DEPOSIT, float(value))
+
+    # act: percorre o extrato de 3 em 3
+    pages = []
+    after_id = 0
+    while True:
+        page = db.get_statement_page(account_number, after_id=after_id, limit=3)
+        if not page:
+            break
+        pages.append([row['value'] for row in page])
+        after_id = page[-1]['id']
+
+    # assert
+    assert pages == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0]]
+
+def test_count_transactions(setup_test_database):
+    """Testa a contagem de transações usada no progresso do extrato."""
+    # arrange
+    client_cpf = "32132132132"
+    db.add_client(client_cpf, "Cliente Contagem", "01-01-1990", "Rua C")
+    account_number = db.add_account("0001", 0, client_cpf)
+    other_account = db.add_account("0001", 0, client_cpf)
+    for value in range(1, 5):
+        db.add_transaction(account_number, db.DEPOSIT, Money(value))
+    db.add_transaction(other_account, db.DEPOSIT, Money(1))
+
+    # act / assert
+    assert db.count_transactions(account_number) == 4
+    assert db.count_transactions(other_account) == 1
+
+def test_get_statement_page_date_range(setup_test_database):
+    """Testa se o filtro por periodo compara as datas na ordem certa (ano, mes, dia)."""
+    # arrange: datas que ficariam fora de ordem se comparadas como texto 'dd-mm-YYYY'
+    from datetime import datetime
+    client_cpf = "12312312312"
+    db.add_client(client_cpf, "Cliente Extrato", "01-01-1990", "Rua C")
+    account_number = db.add_account("0001", 0, client_cpf)
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        for date, value in [("2023-12-31 10:00:00", 1.0), ("2024-01-01 10:00:00", 2.0), ("2024-02-15 10:00:00", 3.0)]:
+            manager.insert('transactions', {'account_number': account_number, 'transaction_type': db.DEPOSIT, 'value': Money(value), 'date': date})
+
+    # act
+    page = db.get_statement_page(account_number, start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 31, 23, 59, 59))
+
+    # assert
+    assert [row['value'] for row in page] == [2.0]
+
+def test_statement_date_range_is_read_from_the_date_index(setup_test_database, monkeypatch):
+    """Testa se o extrato com periodo pagina pelo indice (account_number, date), sem pular nem repetir linhas."""
+    from datetime import datetime
+    # arrange: varias transações no mesmo segundo, para a chave (data, id) desempatar
+    db.add_client("13131313131", "Cliente Periodo", "01-01-1990", "Rua P")
+    account_number = db.add_account("0001", 0, "13131313131")
+    for value, date in [(1, "2023-12-31 10:00:00"), (2, "2024-01-05 10:00:00"), (3, "2024-01-05 10:00:00"),
+                        (4, "2024-01-05 10:00:00"), (5, "2024-01-20 10:00:00"), (6, "2024-02-01 10:00:00")]:
+        _insert_dated_transaction(account_number, db.DEPOSIT, value, date)
+
+    # act: percorre o periodo de 2 em 2
+    pages = []
+    after_id = 0
+    with _recorded_statements(monkeypatch) as statements:
+        while True:
+            page = db.get_statement_page(account_number, after_id=after_id, limit=2,
+                                         start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 31, 23, 59, 59))
+            if not page:
+                break
+            pages.append([row['value'] for row in page])
+            after_id = page[-1]['id']
+
+    # assert
+    assert pages == [[2, 3], [4, 5]]
+    plan = _query_plan(*statements[-1])
+    assert "USING INDEX idx_transactions_account_date (account_number=? AND date>? AND date<?)" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_iter_select_streams_in_chunks(setup_test_database):
+    """Testa se o iter_select devolve todas as linhas, mesmo com blocos menores que a tabela."""
+    # arrange
+    for number in range(7):
+        db.add_client(f"{number:03}", f"Cliente {number}", "01-01-1990", "Rua D")
+
+    # act
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        rows = manager.iter_select('clients', order_by='cpf', arraysize=3)
+        first = next(rows)
+        remaining = list(rows)
+
+    # assert
+    assert first['cpf'] == "000"
+    assert [row['cpf'] for row in remaining] == [f"{number:03}" for number in range(1, 7)]
+
+def test_export_transactions_csv(setup_test_database, tmp_path):
+    """Testa se a exportação gera o cabeçalho e uma linha por transação."""
+    # arrange
+    client_cpf = "12312312312"
+    db.add_client(client_cpf, "Cliente Export", "01-01-1990", "Rua E")
+    account_number = db.add_account("0001", 0, client_cpf)
+    db.post_transaction(account_number, db.DEPOSIT, 10.0)
+    db.post_transaction(account_number, db.DEPOSIT, 20.0)
+    export_file = tmp_path / "extrato.csv"
+
+    # act
+    exported = db.export_transactions_csv(export_file, account_number)
+
+    # assert
+    lines = export_file.read_text(encoding="utf-8").splitlines()
+    assert exported == 2
+    assert lines[0] == "id,account_number,transaction_type,value,date,balance_after"
+    assert len(lines) == 3
+
+def _insert_dated_transaction(account_number, transaction_type, value, date):
+    """Aplica a transação no saldo e grava com uma data fixa, para os testes de historico."""
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        db._post(manager, account_number, transaction_type, value)
+        manager.execute_query("UPDATE transactions SET date = ? WHERE id = (SELECT MAX(id) FROM transactions)", (date,))
+
+@contextmanager
+def _recorded_statements(monkeypatch):
+    """Guarda (query, params) de cada execute_query rodado dentro do bloco 'with'."""
+    statements = []
+    original_execute = db.DataBaseManager.execute_query
+    def spy(manager, query, params=()):
+        statements.append((query, params))
+        return original_execute(manager, query, params)
+    monkeypatch.setattr(db.DataBaseManager, 'execute_query', spy)
+    try:
+        yield statements
+    finally:
+        monkeypatch.setattr(db.DataBaseManager, 'execute_query', original_execute)
+
+def _query_plan(query, params=()):
+    """Os passos do EXPLAIN QUERY PLAN da consulta, juntos num texto só."""
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        return " ".join(row['detail'] for row in manager.execute_query("EXPLAIN QUERY PLAN " + query, params))
+
+def test_running_balance_is_stored_on_each_transaction(setup_test_database):
+    """Testa se cada lançamento guarda o saldo da conta logo depois dele."""
+    # arrange
+    client_cpf = "45645645645"
+    db.add_client(client_cpf, "Cliente Saldo Corrente", "01-01-1990", "Rua F")
+    account_number = db.add_account("0001", 100.0, client_cpf)
+
+    # act
+    db.post_transaction(account_number, db.DEPOSIT, 50.0)
+    db.post_transaction(account_number, db.WITHDRAW, 30.0)
+    db.post_batch([(account_number, db.DEPOSIT, 5.0), (account_number, db.WITHDRAW, 25.0)])
+
+    # assert
+    transactions = db.get_transactions_by_account(account_number)
+    assert [t['balance_after'] for t in transactions] == [150.0, 120.0, 125.0, 100.0]
+
+def test_get_balance_at_before_between_and_after_transactions(setup_test_database):
+    """Testa o saldo historico antes, entre e depois das transações, e depois de um deposito posterior."""
+    from datetime import datetime
+    # arrange
+    client_cpf = "45645645645"
+    db.add_client(client_cpf, "Cliente Historico", "01-01-1990", "Rua F")
+    account_number = db.add_account("0001", 100.0, client_cpf)
+    _insert_dated_transaction(account_number, db.DEPOSIT, 50.0, "2024-01-10 12:00:00")
+    _insert_dated_transaction(account_number, db.WITHDRAW, 20.0, "2024-01-20 12:00:00")
+
+    # act & assert
+    assert db.get_balance_at(account_number, datetime(2024, 1, 1)) == 100.0
+    assert db.get_balance_at(account_number, datetime(2024, 1, 15)) == 150.0
+    assert db.get_balance_at(account_number, datetime(2024, 2, 1)) == 130.0
+
+    # act & assert: um deposito posterior não muda o saldo de antes dele
+    _insert_dated_transaction(account_number, db.DEPOSIT, 70.0, "2024-02-05 12:00:00")
+    assert db.get_balance_at(account_number, datetime(2024, 2, 1)) == 130.0
+    assert db.get_balance_at(account_number, datetime(2024, 2, 10)) == 200.0
+    assert db.get_balance_at(9999, datetime(2024, 2, 10)) is None
+
+def test_running_balance_backfill_on_old_database(tmp_path, monkeypatch):
+    """Testa se um banco antigo, sem a coluna balance_after, ganha a coluna com o historico preenchido."""
+    # arrange: cria o esquema antigo na mão
+    old_db = tmp_path / "old.db"
+    monkeypatch.setattr(db, 'DB_PATH', str(old_db))
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.create_table('clients', {'cpf': 'TEXT PRIMARY KEY', 'name': 'TEXT', 'birth_date': 'TEXT', 'address': 'TEXT'})
+        manager.create_table('accounts', {'number': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'agency': 'TEXT', 'balance': 'REAL',
+                                          'client_cpf': 'TEXT', 'limit_value': 'REAL DEFAULT 500', 'withdraw_limit': 'INTEGER DEFAULT 3'})
+        manager.create_table('transactions', {'id': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'account_number': 'INTEGER',
+                                              'transaction_type': 'TEXT', 'value': 'REAL', 'date': 'TEXT'})
+        manager.insert('clients', {'cpf': '1', 'name': 'Antigo', 'birth_date': '01-01-1990', 'address': 'Rua'})
+        manager.insert('accounts', {'agency': '0001', 'balance': 80.0, 'client_cpf': '1'})
+        for transaction_type, value in [(db.DEPOSIT, 100.0), (db.WITHDRAW, 40.0), (db.DEPOSIT, 20.0)]:
+            manager.insert('transactions', {'account_number': 1, 'transaction_type': transaction_type, 'value': value, 'date': "01-01-2024 00:00:00"})
+
+    # act
+    db.create_project_tables()
+
+    # assert: saldo corrente preenchido e dinheiro convertido para centavos inteiros
+    assert [t['balance_after'] for t in db.get_transactions_by_account(1)] == [100.0, 60.0, 80.0]
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        stored = manager.execute_query("SELECT typeof(balance) AS kind, balance + 0 AS raw FROM accounts").fetchone()
+    assert (stored['kind'], stored['raw']) == ('integer', 8000)
+    db.close_all_pools()
+
+def test_money_sums_are_exact(setup_test_database):
+    """Testa se dez depósitos de R$ 0,10 somam exatamente R$ 1,00 (com float daria 0.9999999999999999)."""
+    # arrange
+    client_cpf = "78978978978"
+    db.add_client(client_cpf, "Cliente Centavos", "01-01-1990", "Rua G")
+    account_number = db.add_account("0001", 0, client_cpf)
+
+    # act
+    for _ in range(10):
+        balance = db.post_transaction(account_number, db.DEPOSIT, 0.1)
+
+    # assert
+    assert balance == Money("1.00")
+    assert balance.cents == 100
+
+def test_select_with_joins_and_limit(setup_test_database):
+    """Testa o select com join, condição com apelido e limite."""
+    # arrange
+    db.add_client("55555555555", "Cliente Join", "01-01-1990", "Rua J")
+    account_number = db.add_account("0001", 0, "55555555555")
+    db.add_account("0001", 0, "55555555555")
+
+    # act
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        rows = manager.select('clients c', columns="c.name, a.number",
+                              joins=[('JOIN', 'accounts a', 'a.client_cpf = c.cpf AND a.number >= ?', (account_number,))],
+                              condition={'c.cpf': "55555555555"}, order_by='a.number', limit=1)
+
+    # assert
+    assert [(row['name'], row['number']) for row in rows] == [("Cliente Join", account_number)]
+
+def test_load_client_graph_in_one_query(setup_test_database):
+    """Testa se o cliente vem com as contas e só as ultimas N transações de cada uma."""
+    # arrange
+    cpf = "66666666666"
+    db.add_client(cpf, "Cliente Grafo", "01-01-1990", "Rua G")
+    first = db.add_account("0001", 0, cpf)
+    second = db.add_account("0001", 0, cpf)
+    for value in range(1, 6):
+        db.post_transaction(first, db.DEPOSIT, value)
+    db.post_transaction(second, db.DEPOSIT, 7)
+    db.add_client("77777777777", "Sem Contas", "01-01-1990", "Rua G")
+
+    # act
+    client = db.load_client_graph(cpf, last_n=3)
+    empty = db.load_client_graph("77777777777")
+
+    # assert
+    assert client.name == "Cliente Grafo"
+    assert [account.number for account in client.accounts] == [first, second]
+    assert client.accounts[0].balance == 15
+    assert [row['value'] for row in client.accounts[0].recent_transactions] == [3, 4, 5]
+    assert isinstance(client.accounts[0].recent_transactions[0]['value'], Money)
+    assert [row['balance_after'] for row in client.accounts[1].recent_transactions] == [7]
+    assert empty.accounts == []
+    assert db.load_client_graph("00000000000") is None
+
+def test_load_client_graph_reads_only_the_last_transactions(setup_test_database, monkeypatch):
+    """Testa se a consulta do grafo busca as ultimas N transações pelo indice, sem materializar o extrato inteiro."""
+    # arrange
+    db.add_client("67676767676", "Cliente Plano", "01-01-1990", "Rua P")
+    account_number = db.add_account("0001", 0, "67676767676")
+    db.post_transaction(account_number, db.DEPOSIT, 1)
+
+    # act
+    with _recorded_statements(monkeypatch) as statements:
+        db.load_client_graph("67676767676")
+
+    # assert
+    plan = _query_plan(*statements[-1])
+    assert "MATERIALIZE" not in plan
+    assert "SCAN" not in plan
+    assert "SEARCH transactions USING COVERING INDEX idx_transactions_account_id (account_number=?)" in plan
+
+def test_generated_sql_is_memoized(setup_test_database):
+    """Testa se o mesmo (operação, tabela, colunas) reaproveita o SQL já montado."""
+    # arrange
+    db._update_sql.cache_clear()
+    db.add_client("88888888888", "Cliente Cache SQL", "01-01-1990", "Rua S")
+    account_number = db.add_account("0001", 0, "88888888888")
+
+    # act
+    for balance in (1, 2, 3):
+        db.update_account_balance(account_number, balance)
+
+    # assert
+    info = db._update_sql.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+    assert db._update_sql('accounts', ('balance',), ('number',)) == "UPDATE accounts SET balance = ? WHERE number = ?"
+    assert db.get_accounts_by_client("88888888888")[0]['balance'] == 3
+
+def test_daily_withdrawal_limit_is_enforced(setup_test_database):
+    """Testa se o limite de saques por dia (withdraw_limit) vale no lançamento avulso e no lote."""
+    # arrange
+    db.add_client("99999999999", "Cliente Limite Diario", "01-01-1990", "Rua L")
+    single = db.add_account("0001", 0, "99999999999")
+    batch = db.add_account("0001", 0, "99999999999")
+    db.post_transaction(single, db.DEPOSIT, 100)
+    db.post_batch([(batch, db.DEPOSIT, 100)])
+
+    # act: o limite padrão é de 3 saques por dia
+    singles = [db.post_transaction(single, db.WITHDRAW, 1) for _ in range(4)]
+    accepted, rejected = db.post_batch([(batch, db.WITHDRAW, 1)] * 2)
+    accepted_after, rejected_after = db.post_batch([(batch, db.WITHDRAW, 1)] * 2)
+
+    # assert
+    assert singles == [99, 98, 97, None]
+    assert (accepted, rejected) == (2, [])
+    assert (accepted_after, len(rejected_after)) == (1, 1)
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        counts = {row['account_number']: row['count'] for row in manager.select('daily_withdrawals')}
+    assert counts == {single: 3, batch: 3}
+    assert db.load_client_graph("99999999999").accounts[0].withdrawals_today == 3
+
+def test_date_range_queries_use_the_date_index(setup_test_database):
+    """Testa se o filtro por data do extrato e o saldo histórico buscam pelo indice (account_number, date)."""
+    # arrange
+    db.add_client("10101010101", "Cliente Indice", "01-01-1990", "Rua D")
+    account_number = db.add_account("0001", 0, "10101010101")
+    db.post_transaction(account_number, db.DEPOSIT, 10)
+
+    # act
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        plan = " ".join(row['detail'] for row in manager.execute_query(
+            "EXPLAIN QUERY PLAN SELECT balance_after FROM transactions WHERE account_number = ? AND date <= ? "
+            "ORDER BY date DESC, id DESC LIMIT 1", (account_number, "2100-01-01 00:00:00")
+        ))
+        stored_date = manager.select('transactions', columns='date', fetch_one=True)['date']
+
+    # assert
+    assert "idx_transactions_account_date" in plan
+    assert "TEMP B-TREE" not in plan
+    assert stored_date[4] == "-" and stored_date[10] == " " # 'YYYY-mm-dd HH:MM:SS'
+
+def test_delete_client_cascades_in_one_statement(setup_test_database, monkeypatch):
+    """Testa a exclusão de um cliente com milhares de contas e transações: um DELETE só e nada órfão."""
+    # arrange: 2000 contas com 10 transações cada, mais um cliente que deve continuar intacto
+    cpf = "20202020202"
+    db.add_client(cpf, "Cliente Grande", "01-01-1990", "Rua Grande")
+    db.add_client("30303030303", "Outro Cliente", "01-01-1990", "Rua Pequena")
+    kept_account = db.add_account("0001", 0, "30303030303")
+    db.post_transaction(kept_account, db.DEPOSIT, 5)
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.insert_many('accounts', ('agency', 'balance', 'client_cpf'), [("0001", Money(0), cpf)] * 2000)
+        numbers = [row['number'] for row in manager.select('accounts', columns='number', condition={'client_cpf': cpf})]
+        manager.insert_many('transactions', ('account_number', 'transaction_type', 'value', 'date', 'balance_after'),
+                            [(number, db.DEPOSIT, Money(1), "2024-01-01 00:00:00", Money(1)) for number in numbers for _ in range(10)])
+
+    # act
+    with _recorded_statements(monkeypatch) as statements:
+        db.delete_client(cpf)
+
+    # assert
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        counts = {table: manager.execute_query(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('clients', 'accounts', 'transactions')}
+        violations = manager.execute_query("PRAGMA foreign_key_check").fetchall()
+    assert [sql for sql, _ in statements if sql.startswith("DELETE")] == ["DELETE FROM clients WHERE cpf = ?"]
+    assert counts == {'clients': 1, 'accounts': 1, 'transactions': 1}
+    assert violations == []
+
+def test_foreign_keys_are_enforced(setup_test_database):
+    """Testa se o banco recusa transação de conta inexistente."""
+    with pytest.raises(sqlite3.IntegrityError):
+        db.add_transaction(9999, db.DEPOSIT, 10)
+
+def test_archive_old_transactions(setup_test_database, tmp_path):
+    """Testa o arquivo morto: move as transações antigas, mantém os saldos e só lê o arquivo quando o periodo pede."""
+    from datetime import datetime
+    # arrange: 3 transações antigas (2023) e 2 recentes (2024)
+    db.add_client("40404040404", "Cliente Arquivo", "01-01-1990", "Rua A")
+    account_number = db.add_account("0001", 0, "40404040404")
+    for value, date in [(10, "2023-01-10 10:00:00"), (20, "2023-06-10 10:00:00"), (30, "2023-12-10 10:00:00"),
+                        (40, "2024-02-10 10:00:00"), (50, "2024-03-10 10:00:00")]:
+        _insert_dated_transaction(account_number, db.DEPOSIT, value, date)
+
+    # act
+    moved = db.archive_transactions(datetime(2024, 1, 1), batch_size=2)
+
+    # assert
+    assert moved == 3
+    assert db.count_transactions(account_number) == 5 # conta também as do arquivo morto
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        hot = manager.execute_query("SELECT COUNT(*) FROM transactions WHERE account_number = ?", (account_number,)).fetchone()[0]
+    assert hot == 2 # o banco principal ficou só com as recentes
+    assert [t['value'] for t in db.get_transactions_by_account(account_number, start_date=datetime(2024, 1, 1))] == [40, 50]
+    assert [t['value'] for t in db.get_transactions_by_account(account_number)] == [10, 20, 30, 40, 50]
+    assert [t['value'] for t in db.get_transactions_by_account(account_number, start_date=datetime(2023, 6, 1),
+                                                               end_date=datetime(2024, 2, 28))] == [20, 30, 40]
+    assert db.get_accounts_by_client("40404040404")[0]['balance'] == 150
+    assert db.get_balance_at(account_number, datetime(2023, 7, 1)) == 30
+    assert db.get_balance_at(account_number, datetime(2023, 1, 1)) == 0
+    assert db.get_balance_at(account_number, datetime(2024, 1, 15)) == 60
+    assert db.get_balance_at(account_number, datetime(2024, 3, 15)) == 150
+    assert [t['value'] for t in db.get_statement_page(account_number, after_id=0, limit=2)] == [10, 20]
+    assert [t['value'] for t in db.get_statement_page(account_number, start_date=datetime(2023, 6, 1), limit=2)] == [20, 30]
+    assert [t['value'] for t in db.get_statement_page(account_number, start_date=datetime(2024, 1, 1))] == [40, 50]
+    assert db.export_transactions_csv(str(tmp_path / "transacoes.csv"), account_number) == 5
+    assert db.archive_transactions(datetime(2024, 1, 1)) == 0
+    assert os.path.exists(db.archive_db_path())
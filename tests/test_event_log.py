@@ -0,0 +1,61 @@
+import os
+from engine.event_log import EventLog
+from engine.money import Money
+
+def test_find_uses_index_per_cpf_and_account(tmp_path):
+    """Testa se a busca por CPF e por conta traz só os eventos certos, na ordem em que foram gravados."""
+    # arrange
+    event_log = EventLog(str(tmp_path / "eventos.jsonl"), batch_size=2)
+    event_log.record("deposito", cpf="111", account_number=1, value=Money("10.50"), latency_ms=1.2345)
+    event_log.record("saque", cpf="222", account_number=2, value=Money(5))
+    event_log.record("saque", cpf="111", account_number=3, value=Money(7))
+    event_log.record("cliente_criado", cpf="111")
+
+    # act
+    by_cpf = event_log.find(cpf="111")
+    by_account = event_log.find(account_number=2)
+    by_both = event_log.find(cpf="111", account_number=3)
+
+    # assert
+    assert [event['event'] for event in by_cpf] == ["deposito", "saque", "cliente_criado"]
+    assert by_cpf[0]['value_cents'] == 1050
+    assert by_cpf[0]['latency_ms'] == 1.234
+    assert [event['cpf'] for event in by_account] == ["222"]
+    assert [event['account_number'] for event in by_both] == [3]
+    event_log.close()
+
+def test_rebuild_index_from_file(tmp_path):
+    """Testa se o indice pode ser refeito a partir do arquivo de eventos."""
+    # arrange: grava eventos e apaga o indice
+    file_path = str(tmp_path / "eventos.jsonl")
+    event_log = EventLog(file_path)
+    event_log.record("deposito", cpf="111", account_number=1, value=Money(1))
+    event_log.record("deposito", cpf="222", account_number=2, value=Money(2))
+    event_log.close()
+    os.remove(f"{file_path}.idx")
+
+    # act
+    event_log = EventLog(file_path)
+    assert event_log.find(cpf="222") == []
+    event_log.rebuild_index()
+
+    # assert
+    assert [event['value_cents'] for event in event_log.find(cpf="222")] == [200]
+    event_log.close()
+
+def test_pending_events_are_written_after_the_flush_interval(tmp_path):
+    """Testa se um evento sozinho, sem encher o lote, vai pro arquivo depois do flush_interval."""
+    import time
+    # arrange
+    file_path = tmp_path / "eventos.jsonl"
+    event_log = EventLog(str(file_path), batch_size=100, flush_interval=0.05)
+
+    # act
+    event_log.record("deposito", cpf="111", account_number=1, value=Money(1))
+    deadline = time.monotonic() + 5
+    while not (file_path.exists() and file_path.stat().st_size) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    # assert
+    assert file_path.read_text(encoding="utf-8").count("\n") == 1
+    event_log.close()
@@ -0,0 +1,51 @@
+from engine import events
+from engine import database as db
+from engine.checkingAccount import CheckingAccount
+
+def test_level_filter_and_unsubscribe():
+    """Testa se cada assinante só recebe os eventos do nivel dele para cima."""
+    # arrange
+    received = []
+    warnings = []
+    collect = lambda level, name, message, fields: received.append((name, message))
+    collect_warnings = lambda level, name, message, fields: warnings.append(name)
+
+    # act
+    with events.subscribed(collect, events.DEBUG), events.subscribed(collect_warnings, events.WARNING):
+        events.emit(events.DEBUG, 'test.debug', "linha {number}", number=1)
+        events.emit(events.WARNING, 'test.warning', "recusado")
+    events.emit(events.ERROR, 'test.error', "ninguem ouvindo")
+
+    # assert
+    assert received == [('test.debug', "linha 1"), ('test.warning', "recusado")]
+    assert warnings == ['test.warning']
+    assert not events.is_enabled(events.ERROR)
+
+def test_message_is_not_formatted_without_subscribers():
+    """Testa se, sem assinantes, os campos da mensagem nem são formatados."""
+    class Explodes():
+        def __format__(self, spec):
+            raise AssertionError("não deveria formatar")
+
+    # act / assert
+    events.emit(events.DEBUG, 'test.lazy', "{value}", value=Explodes())
+
+def test_engine_messages_reach_subscribers(tmp_path, monkeypatch):
+    """Testa se o banco e as contas emitem os eventos no lugar dos print()."""
+    # arrange
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / "events.db"))
+    counter = events.EventCounter()
+    messages = []
+
+    # act
+    with events.subscribed(counter, events.DEBUG), \
+         events.subscribed(lambda level, name, message, fields: messages.append(message), events.WARNING):
+        db.create_project_tables()
+        db.add_client("123", "Cliente Eventos", "01-01-1990", "Rua E")
+        CheckingAccount(number=1, client=None, limit=100).withdraw(200)
+    db.close_all_pools()
+
+    # assert
+    assert counter.counts['db.row_inserted'] == 1
+    assert counter.counts['db.tables_ready'] == 1
+    assert messages == ["!!! Operação não permitida: valor do saque (R$ 200.00) é maior que o seu limite de (R$ 100.00)."]
@@ -0,0 +1,44 @@
+import os
+from engine.log_writer import LogWriter
+
+def test_lines_are_written_in_order(tmp_path):
+    """Testa se todas as linhas enfileiradas chegam ao arquivo, na ordem."""
+    # arrange
+    log_file = tmp_path / "log.txt"
+    writer = LogWriter(str(log_file), batch_size=10, flush_interval=5)
+
+    # act
+    for number in range(25):
+        writer.write(f"linha {number}")
+    writer.flush()
+
+    # assert
+    assert log_file.read_text(encoding="utf-8").splitlines() == [f"linha {number}" for number in range(25)]
+    writer.close()
+
+def test_close_writes_pending_lines(tmp_path):
+    """Testa se o close grava o lote que ainda não tinha atingido o tamanho nem o tempo."""
+    log_file = tmp_path / "log.txt"
+    writer = LogWriter(str(log_file), batch_size=1000, flush_interval=60)
+
+    writer.write("ultima linha")
+    writer.close()
+
+    assert log_file.read_text(encoding="utf-8") == "ultima linha\n"
+
+def test_file_is_rotated_by_size(tmp_path):
+    """Testa se o arquivo é rotacionado ao passar do tamanho, mantendo só 'backup_count' antigos."""
+    # arrange
+    log_file = tmp_path / "log.txt"
+    writer = LogWriter(str(log_file), max_bytes=50, backup_count=2, batch_size=1)
+
+    # act: cada linha tem 30 bytes, então cada 2 linhas geram uma rotação
+    for number in range(8):
+        writer.write(f"{number:029}")
+    writer.close()
+
+    # assert
+    assert os.path.exists(f"{log_file}.1")
+    assert os.path.exists(f"{log_file}.2")
+    assert not os.path.exists(f"{log_file}.3")
+    assert open(f"{log_file}.1", encoding="utf-8").read().splitlines() == [f"{6:029}", f"{7:029}"]
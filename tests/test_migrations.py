@@ -0,0 +1,137 @@
+import pytest
+from engine import database as db
+from engine import events, migrations
+
+@pytest.fixture
+def legacy_database(tmp_path, monkeypatch):
+    """
+    Cria um banco no esquema antigo (dinheiro em REAL, sem saldo corrente e sem indices)
+    com uma conta e 10 transações.
+    """
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / "legacy.db"))
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.create_table('clients', {'cpf': 'TEXT PRIMARY KEY', 'name': 'TEXT', 'birth_date': 'TEXT', 'address': 'TEXT'})
+        manager.create_table('accounts', {'number': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'agency': 'TEXT', 'balance': 'REAL',
+                                          'client_cpf': 'TEXT', 'limit_value': 'REAL DEFAULT 500', 'withdraw_limit': 'INTEGER DEFAULT 3'})
+        manager.create_table('transactions', {'id': 'INTEGER PRIMARY KEY AUTOINCREMENT', 'account_number': 'INTEGER',
+                                              'transaction_type': 'TEXT', 'value': 'REAL', 'date': 'TEXT'})
+        manager.insert('clients', {'cpf': '1', 'name': 'Antigo', 'birth_date': '01-01-1990', 'address': 'Rua'})
+        manager.insert('accounts', {'agency': '0001', 'balance': 1.0, 'client_cpf': '1'})
+        for _ in range(10):
+            manager.insert('transactions', {'account_number': 1, 'transaction_type': db.DEPOSIT, 'value': 0.1, 'date': "01-01-2024 00:00:00"})
+    yield
+    db.close_all_pools()
+
+def _schema_version():
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        return migrations.get_schema_version(manager)
+
+def test_new_database_is_created_at_latest_version(tmp_path, monkeypatch):
+    """Testa se um banco novo já nasce na ultima versão e não reaplica nada."""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / "new.db"))
+    db.create_project_tables()
+
+    assert _schema_version() == migrations.latest_version()
+    assert migrations.run_migrations(db.DB_PATH) == []
+    db.close_all_pools()
+
+def test_legacy_database_migrates_in_batches(legacy_database):
+    """Testa se o banco antigo é migrado em lotes, com progresso, e fica com os dados corretos."""
+    # arrange
+    reports = []
+
+    # act
+    applied = migrations.run_migrations(db.DB_PATH, batch_size=3, progress=lambda *report: reports.append(report))
+
+    # assert
+    assert applied == [1, 2, 3, 4, 5, 6, 7, 8]
+    assert _schema_version() == migrations.latest_version()
+    money_reports = [(done, total) for version, _, done, total in reports if version == 2]
+    assert money_reports == [(3, 10), (6, 10), (9, 10), (10, 10)]
+
+    transactions = db.get_transactions_by_account(1)
+    assert [t['value'].cents for t in transactions] == [10] * 10
+    assert transactions[-1]['balance_after'] == 1.0
+    assert transactions[0]['balance_after'] == 0.1
+    assert {t['date'] for t in transactions} == {"2024-01-01 00:00:00"}
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        assert [row['on_delete'] for row in manager.execute_query("PRAGMA foreign_key_list(transactions)")] == ['CASCADE']
+        indexes = {row['name'] for row in manager.execute_query("PRAGMA index_list(transactions)")}
+    assert {'idx_transactions_account_id', 'idx_transactions_account_date'} <= indexes
+
+def test_interrupted_migration_resumes_from_checkpoint(legacy_database):
+    """Testa se uma migração interrompida continua de onde parou, sem duplicar nem perder linhas."""
+    # arrange: derruba a migração 2 logo depois do primeiro lote
+    def crash_after_first_batch(version, description, done, total):
+        if version == 2:
+            raise KeyboardInterrupt("queda no meio da migração")
+
+    with pytest.raises(KeyboardInterrupt):
+        migrations.run_migrations(db.DB_PATH, batch_size=4, progress=crash_after_first_batch)
+    assert _schema_version() == 1
+    db.close_all_pools()
+
+    # act: roda de novo
+    reports = []
+    applied = migrations.run_migrations(db.DB_PATH, batch_size=4, progress=lambda *report: reports.append(report))
+
+    # assert: retomou a partir da linha 4
+    assert applied == [2, 3, 4, 5, 6, 7, 8]
+    assert [(done, total) for version, _, done, total in reports if version == 2] == [(8, 10), (10, 10)]
+    transactions = db.get_transactions_by_account(1)
+    assert len(transactions) == 10
+    assert sum(t['value'].cents for t in transactions) == 100
+
+def test_default_progress_is_an_event_and_prints_nothing(legacy_database, capsys):
+    """Testa se o progresso padrão sai como evento (para quem assina) e não no stdout."""
+    # arrange
+    reports = []
+    def collect(level, name, message, fields):
+        if name == 'db.migration_progress':
+            reports.append((fields['version'], fields['done'], fields['total']))
+
+    # act
+    with events.subscribed(collect, events.INFO):
+        migrations.run_migrations(db.DB_PATH, batch_size=5)
+
+    # assert
+    assert (2, 10, 10) in reports
+    assert capsys.readouterr().out == ""
+
+def test_orphan_rows_are_set_aside_and_reported(legacy_database):
+    """Testa se as linhas órfãs saem do caminho das chaves estrangeiras sem serem apagadas, com um evento contando."""
+    # arrange: uma conta de cliente que não existe (com uma transação) e uma transação de conta que não existe
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.insert('accounts', {'number': 2, 'agency': '0001', 'balance': 5.0, 'client_cpf': 'sumiu'})
+        manager.insert('transactions', {'account_number': 2, 'transaction_type': db.DEPOSIT, 'value': 5.0, 'date': "01-01-2024 00:00:00"})
+        manager.insert('transactions', {'account_number': 99, 'transaction_type': db.DEPOSIT, 'value': 7.0, 'date': "01-01-2024 00:00:00"})
+    reports = []
+    def collect(level, name, message, fields):
+        if name == 'db.migration_orphans':
+            reports.append((level, fields['total'], fields['orphans']))
+
+    # act
+    with events.subscribed(collect, events.WARNING):
+        migrations.run_migrations(db.DB_PATH, progress=None)
+
+    # assert
+    assert reports == [(events.WARNING, 3, {'accounts': 1, 'transactions': 2})]
+    assert len(db.get_transactions_by_account(1)) == 10
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        assert [row['number'] for row in manager.select('orphaned_accounts')] == [2]
+        assert sorted(row['account_number'] for row in manager.select('orphaned_transactions')) == [2, 99]
+
+def test_balance_snapshots_table_is_dropped(legacy_database):
+    """Testa se a tabela de fotos de saldo, que nada mais lê, sai do banco na migração."""
+    # arrange
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        manager.create_table('balance_snapshots', {'account_number': 'INTEGER', 'taken_at': 'TEXT', 'balance': 'REAL'})
+
+    # act
+    migrations.run_migrations(db.DB_PATH, progress=None)
+
+    # assert
+    with db.DataBaseManager(db.DB_PATH) as manager:
+        tables = {row['name'] for row in manager.execute_query("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'balance_snapshots' not in tables
+    assert len(db.get_transactions_by_account(1)) == 10
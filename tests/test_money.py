@@ -0,0 +1,73 @@
+import pytest
+from decimal import Decimal
+from engine.money import Money, to_cents
+
+def test_to_cents_accepts_common_inputs():
+    """Testa a conversão para centavos a partir dos formatos aceitos."""
+    assert to_cents(10) == 1000
+    assert to_cents(0.1) == 10
+    assert to_cents(Decimal("2.345")) == 235 # meio centavo arredonda pra cima
+    assert to_cents("10.50") == 1050
+    assert to_cents("R$ 1.234,56") == 123456
+
+def test_to_cents_rejects_invalid_text():
+    """Testa se texto que não é numero gera ValueError."""
+    with pytest.raises(ValueError):
+        to_cents("dez reais")
+
+@pytest.mark.parametrize("text", ["10.005", "10,005", "1,234.56", "1.234.56", "1,234,56", "12.34,56", "1.2345", "1.234"])
+def test_to_cents_rejects_ambiguous_text(text):
+    """Testa se texto com mais de 2 casas ou com separadores misturados gera ValueError em vez de ser arredondado."""
+    with pytest.raises(ValueError):
+        to_cents(text)
+
+def test_to_cents_accepts_both_text_formats():
+    """Testa se o formato com ponto decimal e o brasileiro com milhar dão o mesmo valor."""
+    assert to_cents("1234.56") == to_cents("1.234,56") == to_cents("1234,56") == 123456
+    assert to_cents("R$ 1.234.567,8") == 123456780
+    assert to_cents("-0,5") == -50
+
+def test_money_arithmetic_and_comparison():
+    """Testa se as contas com Money são exatas e comparáveis com numeros comuns."""
+    # arrange
+    total = Money(0)
+
+    # act
+    for _ in range(10):
+        total += 0.1
+
+    # assert
+    assert total == 1
+    assert total.cents == 100
+    assert total > Money("0.99")
+    assert -total < 0
+    assert Money(5) - 1.5 == Money("3.50")
+    assert Money(5) - Decimal("1.5") == Money("3.50")
+    assert Money("10.50") == Decimal("10.5")
+    assert hash(Money("10.50")) == hash(Decimal("10.5"))
+
+def test_money_does_not_parse_or_round_other_operands():
+    """Testa se texto não vira Money escondido numa comparação ou soma, e se float e Decimal são comparados pelo valor exato."""
+    assert Money(10) != '10'
+    assert Money(100) == 100.0
+    assert Money("0.10") == 0.1
+    assert Money(1) < 1.5
+    assert Money(10) != 9.995
+    assert Money(10) > 9.995
+    assert Money(10) != Decimal("9.995")
+    assert Money(10) > Decimal("9.995")
+    assert Money(10) != float("nan")
+    with pytest.raises(TypeError):
+        Money(1) + '2,50'
+    with pytest.raises(TypeError):
+        Money(1) + 0.005 # fração de centavo
+    with pytest.raises(TypeError):
+        Money(1) + Decimal("0.005")
+
+def test_money_formatting():
+    """Testa se o Money formata como os floats formatavam antes."""
+    value = Money.from_cents(123456)
+
+    assert f"{value:.2f}" == "1234.56"
+    assert str(value) == "1234.56"
+    assert repr(value) == "Money('1234.56')"
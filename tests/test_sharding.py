@@ -0,0 +1,183 @@
+import json
+import pytest
+from engine import database as db
+
+@pytest.fixture
+def router(tmp_path):
+    """Dois shards temporarios: agencia 0001 no shard 'a' e 0002 no shard 'b', com faixas de 1000 contas."""
+    router = db.ShardRouter({'a': str(tmp_path / "a.db"), 'b': str(tmp_path / "b.db")},
+                            {'0001': 'a', '0002': 'b'}, account_range=1000)
+    router.create_tables()
+    yield router
+    router.close()
+    db.close_all_pools()
+
+def test_accounts_are_numbered_and_routed_by_shard(router):
+    """Testa se cada agencia abre contas na faixa do seu shard e se o numero leva ao arquivo certo."""
+    # arrange
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+
+    # act
+    first = router.add_account("0001", 0, "123")
+    second = router.add_account("0002", 0, "123")
+
+    # assert
+    assert (first, second) == (1, 1001)
+    assert router.shard_for_account(first) == router.shards['a']
+    assert router.shard_for_account(second) == router.shards['b']
+    with pytest.raises(ValueError):
+        router.shard_for_account(2001)
+
+def test_transactions_include_the_shard_archive(router, monkeypatch):
+    """Testa se o extrato de uma conta num shard arquivado junta o arquivo morto daquele shard."""
+    from datetime import datetime, timedelta
+    # arrange
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0002")
+    account_number = router.add_account("0002", 0, "123")
+    router.post_transaction(account_number, db.DEPOSIT, 10)
+    router.post_transaction(account_number, db.DEPOSIT, 20)
+    monkeypatch.setattr(db, "DB_PATH", router.shards['b'])
+    db.archive_transactions(datetime.now() + timedelta(days=1))
+
+    # act
+    transactions = router.get_transactions_by_account(account_number)
+
+    # assert
+    assert [t['value'] for t in transactions] == [10, 20]
+
+def test_client_is_copied_to_every_shard_with_accounts(router):
+    """Testa se o cliente aparece uma vez só na listagem, mesmo gravado nos dois shards."""
+    # arrange
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+    router.add_client("456", "Cliente B", "01-01-1990", "Rua B", "0002")
+    router.add_account("0002", 0, "123")
+
+    # act
+    clients = router.get_all_clients()
+
+    # assert
+    assert [client['cpf'] for client in clients] == ["123", "456"]
+    assert router.add_client("123", "Repetido", "01-01-1990", "Rua", "0002") is False
+    assert [account['agency'] for account in router.get_accounts_by_client("123")] == ["0002"]
+
+def test_concurrent_add_client_registers_the_cpf_once(router):
+    """Testa se duas threads cadastrando o mesmo CPF em agencias de shards diferentes gravam um cliente só."""
+    from concurrent.futures import ThreadPoolExecutor
+    # act
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(lambda agency: router.add_client("123", "Cliente A", "01-01-1990", "Rua A", agency),
+                                    ["0001", "0002"]))
+
+    # assert
+    assert sorted(results) == [False, True]
+    assert len(router.get_all_clients()) == 1
+
+def test_post_transaction_goes_to_the_account_shard(router):
+    """Testa se os lançamentos são gravados só no shard da conta."""
+    # arrange
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+    account_a = router.add_account("0001", 0, "123")
+    account_b = router.add_account("0002", 0, "123")
+
+    # act
+    router.post_transaction(account_a, db.DEPOSIT, 10)
+    balance = router.post_transaction(account_b, db.DEPOSIT, "2,50")
+
+    # assert
+    assert balance == 2.5
+    assert len(router.get_transactions_by_account(account_a)) == 1
+    with db.DataBaseManager(router.shards['a']) as manager:
+        assert manager.select('transactions', condition={'account_number': account_b}) == []
+
+def test_rebalance_moves_accounts_to_the_target_shard(router, tmp_path):
+    """Testa se o rebalanceamento leva as contas e o historico para o destino e grava as faixas novas."""
+    # arrange
+    config_path = str(tmp_path / "shards.json")
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+    accounts = [router.add_account("0001", 0, "123") for _ in range(3)]
+    for number in accounts:
+        router.post_transaction(number, db.DEPOSIT, 5)
+    router.post_transaction(3, db.WITHDRAW, 1)
+    target_account = router.add_account("0002", 0, "123")
+    router.post_transaction(target_account, db.DEPOSIT, 9) # ids de transação que colidem com os da origem
+
+    # act
+    moved = router.rebalance(2, 3, 'b', config_path=config_path)
+
+    # assert
+    assert moved == 2
+    assert router.shard_for_account(1) == router.shards['a']
+    assert router.shard_for_account(3) == router.shards['b']
+    moved_transactions = router.get_transactions_by_account(3)
+    assert [t['value'] for t in moved_transactions] == [5, 1]
+    assert [t['value'] for t in router.get_transactions_by_account(target_account)] == [9]
+    with db.DataBaseManager(router.shards['b']) as manager:
+        withdrawals = manager.select('daily_withdrawals', condition={'account_number': 3}, fetch_one=True)
+    assert withdrawals['count'] == 1
+    with db.DataBaseManager(router.shards['a']) as manager:
+        assert manager.select('transactions', condition={'account_number': 3}) == []
+    assert router.add_account("0001", 0, "123") == 4 # a origem continua de onde parou
+    assert router.add_account("0002", 0, "123") == 1002
+    assert db.ShardRouter.load(config_path).ranges == router.ranges
+    with open(config_path, encoding="utf-8") as f:
+        assert [2, 3, 'b'] in json.load(f)['ranges']
+
+def test_rebalance_refuses_numbers_not_yet_used(router):
+    """Testa se não dá para mover uma faixa com numeros que o shard ainda vai abrir."""
+    # arrange
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+    router.add_account("0001", 0, "123")
+
+    # act / assert
+    with pytest.raises(ValueError):
+        router.rebalance(1, 10, 'b')
+    assert router.shard_for_account(10) == router.shards['a']
+
+def test_rebalance_resumes_after_a_crash(router, tmp_path, monkeypatch):
+    """Testa se o rebalanceamento interrompido (antes e depois de gravar o mapa) termina sem duplicar nada."""
+    # arrange
+    config_path = str(tmp_path / "shards.json")
+    router.save(config_path)
+    router.add_client("123", "Cliente A", "01-01-1990", "Rua A", "0001")
+    accounts = [router.add_account("0001", 0, "123") for _ in range(4)]
+    for number in accounts:
+        router.post_transaction(number, db.DEPOSIT, 5)
+    original_save = router.save
+    original_delete = db._delete_account_range
+    def crash(*args):
+        raise RuntimeError("queda no meio do rebalanceamento")
+
+    # act: cai depois de copiar e antes de gravar o mapa; depois, cai com o mapa gravado e antes de apagar a origem
+    monkeypatch.setattr(router, 'save', crash)
+    with pytest.raises(RuntimeError):
+        router.rebalance(1, 2, 'b', config_path=config_path)
+    assert router.shard_for_account(1) == router.shards['a']
+    monkeypatch.setattr(router, 'save', original_save)
+    first_retry = router.rebalance(1, 2, 'b', config_path=config_path)
+
+    monkeypatch.setattr(db, '_delete_account_range', crash)
+    with pytest.raises(RuntimeError):
+        router.rebalance(3, 4, 'b', config_path=config_path)
+    monkeypatch.setattr(db, '_delete_account_range', original_delete)
+    second_retry = db.ShardRouter.load(config_path).rebalance(3, 4, 'b', config_path=config_path)
+
+    # assert
+    assert (first_retry, second_retry) == (2, 0)
+    with db.DataBaseManager(router.shards['a']) as manager:
+        assert manager.select('accounts') == []
+        assert manager.select('transactions') == []
+    with db.DataBaseManager(router.shards['b']) as manager:
+        assert sorted(row['number'] for row in manager.select('accounts')) == accounts
+        assert len(manager.select('transactions')) == 4
+
+def test_router_config_keeps_the_profile(router, tmp_path):
+    """Testa se o perfil de durabilidade vai junto no arquivo do mapa."""
+    # arrange
+    config_path = str(tmp_path / "shards.json")
+    router.profile = 'strict'
+
+    # act
+    router.save(config_path)
+
+    # assert
+    assert db.ShardRouter.load(config_path).profile == 'strict'
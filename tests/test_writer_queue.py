@@ -0,0 +1,110 @@
+import threading
+import pytest
+from engine import database as db
+from engine.writer_queue import WriterQueue, get_writer
+
+@pytest.fixture
+def account_number(tmp_path, monkeypatch):
+    """Banco temporario com um cliente e uma conta zerada."""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / "writer.db"))
+    db.create_project_tables()
+    db.add_client("123", "Cliente Fila", "01-01-1990", "Rua F")
+    yield db.add_account("0001", 0, "123")
+    db.close_all_pools()
+
+def test_concurrent_posts_are_grouped_in_fewer_commits(account_number):
+    """Testa se lançamentos de varias threads saem em grupos, sem perder nenhum."""
+    # arrange
+    writer = WriterQueue(flush_interval=0.005)
+    group_sizes = []
+    original_apply = writer._apply
+    writer._apply = lambda group: (group_sizes.append(len(group)), original_apply(group))
+
+    def worker():
+        for _ in range(50):
+            writer.post(account_number, db.DEPOSIT, 1).result()
+
+    # act
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+
+    # assert
+    assert sum(group_sizes) == 400
+    assert max(group_sizes) > 1
+    assert db.get_accounts_by_client("123")[0]['balance'] == 400
+    assert db.count_transactions(account_number) == 400
+
+def test_failed_operation_does_not_undo_the_group(account_number):
+    """Testa se o erro de uma operação só desfaz ela, e não o resto do commit."""
+    # arrange
+    writer = WriterQueue(flush_interval=0.05)
+    def broken(db_manager):
+        db_manager.execute_query("UPDATE accounts SET balance = balance + 999")
+        raise RuntimeError("falhou")
+
+    # act
+    first = writer.post(account_number, db.DEPOSIT, 10)
+    failed = writer.submit(broken)
+    refused = writer.post(account_number, db.WITHDRAW, 1000)
+    last = writer.post(account_number, db.WITHDRAW, 4)
+    writer.close()
+
+    # assert
+    assert first.result() == 10
+    with pytest.raises(RuntimeError):
+        failed.result()
+    assert refused.result() is None
+    assert last.result() == 6
+    assert db.get_accounts_by_client("123")[0]['balance'] == 6
+
+def test_post_transaction_uses_the_writer_queue(account_number):
+    """Testa se post_transaction continua devolvendo o novo saldo passando pela fila."""
+    # act
+    balance = db.post_transaction(account_number, db.DEPOSIT, "12,50")
+
+    # assert
+    assert balance == 12.5
+    assert db.post_transaction(account_number, db.WITHDRAW, 0) is None
+
+def test_every_module_write_goes_through_the_writer_queue(account_number, monkeypatch):
+    """Testa se as escritas do módulo (cadastros, lotes, arquivo morto, exclusões) rodam na thread da fila."""
+    from datetime import datetime
+    # arrange
+    writing_threads = set()
+    original_execute = db.DataBaseManager.execute_query
+    def spy(manager, query, params=()):
+        if query.split()[0] in ("INSERT", "UPDATE", "DELETE", "BEGIN"):
+            writing_threads.add(threading.current_thread().name)
+        return original_execute(manager, query, params)
+    monkeypatch.setattr(db.DataBaseManager, 'execute_query', spy)
+
+    # act
+    db.add_client("456", "Outro Cliente", "01-01-1990", "Rua G")
+    other_account = db.add_account("0001", 0, "456")
+    db.update_account_balance(other_account, 5)
+    db.add_transaction(other_account, db.DEPOSIT, 5)
+    db.post_batch([(account_number, db.DEPOSIT, 3)])
+    db.archive_transactions(datetime(2100, 1, 1))
+    db.delete_account(other_account)
+    db.delete_client("456")
+
+    # assert
+    monkeypatch.setattr(db.DataBaseManager, 'execute_query', original_execute)
+    assert writing_threads == {"db-writer-queue"}
+    assert db.get_accounts_by_client("123")[0]['balance'] == 3
+    assert db.get_client_by_cpf("456") is None
+
+def test_one_writer_per_file_whatever_the_profile(account_number):
+    """Testa se o arquivo tem uma fila de escrita só, e se pedir outro perfil com ela rodando é recusado."""
+    # arrange
+    writer = get_writer(db.DB_PATH)
+
+    # act / assert
+    assert get_writer(db.DB_PATH, db.DB_PROFILE) is writer
+    with pytest.raises(ValueError):
+        db.post_batch([(account_number, db.DEPOSIT, 3)], profile='bulk')
+    assert db.get_accounts_by_client("123")[0]['balance'] == 0